@@ -0,0 +1,170 @@
+"""
+    Scaling benchmarks for ontology.py.
+
+    Times every stage of a conversion separately on synthetic inputs of growing
+    size and writes the results as JSON, so that runs on different commits can
+    be compared:
+
+        python benchmarks/run_benchmarks.py -o before.json
+        python benchmarks/run_benchmarks.py -o after.json --compare before.json
+
+    The planning ontology is loaded from the local snapshot (see "python ontology.py
+    snapshot" and --snapshot), so no network is needed.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import rdflib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ontology
+import synthetic
+
+SCENARIOS = {
+    "small": dict(objects=50, init=500, actions=5, depth=1, plan=50),
+    "medium": dict(objects=500, init=20000, actions=50, depth=2, plan=2000),
+    "large": dict(objects=2000, init=200000, actions=200, depth=3, plan=20000),
+}
+
+def best_time(fn, repeat: int) -> float:
+    """
+        Best wall time of `repeat` calls of fn, in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best, 6)
+
+def run_scenario(params: dict, repeat: int) -> dict:
+    """
+        Generate the inputs of one scenario and time each conversion stage.
+    """
+    domain_raw, problem_raw, plan_raw = synthetic.generate(**params)
+    parser = ontology.PDDLParser("", "", "")
+    timings = {}
+
+    timings["remove_comments.domain"] = best_time(lambda: parser._remove_pddl_comments(domain_raw), repeat)
+    timings["remove_comments.problem"] = best_time(lambda: parser._remove_pddl_comments(problem_raw), repeat)
+    domain_text = parser._remove_pddl_comments(domain_raw)
+    problem_text = parser._remove_pddl_comments(problem_raw)
+
+    timings["tokenize.domain"] = best_time(lambda: ontology.parse_sexpr(domain_text), repeat)
+    timings["tokenize.problem"] = best_time(lambda: ontology.parse_sexpr(problem_text), repeat)
+
+    timings["index.problem"] = best_time(lambda: list(ontology.SectionIndex(problem_text)), repeat)
+    timings["PDDLParser.objects"] = best_time(lambda: ontology.PDDLParser("", problem_raw).objects, repeat)
+
+    # Getters are timed on already indexed and tokenized sections, tokenization is timed above
+    df = ontology.DomainFunctions()
+    for name in ("get_domain_name", "get_requirements", "get_types", "get_constants", "get_predicates", "get_actions"):
+        getattr(df, name)(domain_text)
+        timings[f"DomainFunctions.{name}"] = best_time(lambda: getattr(df, name)(domain_text), repeat)
+    pf = ontology.ProblemFunctions()
+    for name in ("get_problem_name", "get_objects", "get_initial_state", "get_goal_state"):
+        getattr(pf, name)(problem_text)
+        timings[f"ProblemFunctions.{name}"] = best_time(lambda: getattr(pf, name)(problem_text), repeat)
+
+    timings["iter_plan_steps"] = best_time(lambda: list(ontology.iter_plan_steps(plan_raw)), repeat)
+    timings["PDDLParser.run"] = best_time(lambda: ontology.PDDLParser(domain_raw, problem_raw, plan_raw).run(), repeat)
+    data = ontology.PDDLParser(domain_raw, problem_raw, plan_raw).run()
+    timings["PDDLParser.run_ir"] = best_time(lambda: ontology.PDDLParser(domain_raw, problem_raw, plan_raw).run_ir(), repeat)
+    domain_ir = ontology.PDDLParser(domain_raw, problem_raw, plan_raw).run_ir()
+
+    timings["copy_base_ontology"] = best_time(lambda: ontology.copy_base_ontology("local"), repeat)
+
+    # build_from_dict is split into building the graph and serializing it
+    graphs = []
+    def build():
+        graph = ontology.copy_base_ontology("local")
+        ontology.OntologyBuilder(graph).add_data(data)
+        graphs.append(graph)
+    timings["OntologyBuilder.build"] = best_time(build, repeat)
+    timings["OntologyBuilder.build_ir"] = best_time(
+        lambda: ontology.OntologyBuilder(ontology.copy_base_ontology("local")).add_ir(domain_ir), repeat)
+    graph = graphs[-1]
+    timings["serialize.rdfxml"] = best_time(lambda: graph.serialize(format="application/rdf+xml"), repeat)
+
+    problem = data["synthetic"]["Problems"]["synthetic-1"]
+    counts = {
+        "predicates": len(data["synthetic"]["predicates"]),
+        "actions": len(data["synthetic"]["actions"]),
+        "init_facts": len(problem["init"]),
+        "plan_steps": len(problem.get("plan", [])),
+        "triples": len(graph),
+        "input_bytes": len(domain_raw) + len(problem_raw) + len(plan_raw),
+    }
+    return {"params": params, "timings": timings, "counts": counts}
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: dict, previous: dict):
+    """
+        Print the time ratio (current / previous) of every stage present in both result sets.
+    """
+    for scenario, current in results["scenarios"].items():
+        before = previous.get("scenarios", {}).get(scenario)
+        if not before:
+            continue
+        print(f"[{scenario}]")
+        for stage, seconds in current["timings"].items():
+            old = before["timings"].get(stage)
+            if old:
+                print(f"  {stage:40s} {old:10.4f}s -> {seconds:10.4f}s  x{seconds / old:.2f}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time each stage of the PDDL to ontology conversion.")
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS), help="Scenario to run (repeatable, default: small and medium)")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Runs per stage, the best time is kept")
+    parser.add_argument("-o", "--output", default=None, help="Write the JSON results to this file instead of stdout")
+    parser.add_argument("--compare", default=None, help="Previous JSON results to compare against")
+    parser.add_argument("--snapshot", default=None, help="Planning ontology snapshot to load instead of plan-ontology.nt next to ontology.py")
+    args = parser.parse_args(argv)
+
+    if args.snapshot:
+        ontology.BASE_SNAPSHOT_PATH = args.snapshot
+    # Always the snapshot, so that timings never depend on the network
+    if not os.path.exists(ontology.BASE_SNAPSHOT_PATH):
+        parser.error(f"planning ontology snapshot not found at {ontology.BASE_SNAPSHOT_PATH}, "
+                     "create it with 'python ontology.py snapshot' or pass --snapshot")
+    ontology.load_base_ontology("local")
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "rdflib": rdflib.__version__,
+            "repeat": args.repeat,
+        },
+        "scenarios": {},
+    }
+    for name in args.scenario or ["small", "medium"]:
+        results["scenarios"][name] = run_scenario(SCENARIOS[name], args.repeat)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+    Synthetic PDDL generator for the benchmarks.
+
+    Produces a domain, a problem and a plan whose sizes are set by a few knobs,
+    so that each part of the conversion pipeline can be timed at growing scales.
+    The output is deterministic for a given seed.
+"""
+import random
+
+def _condition(rng, predicates, params, depth):
+    """
+        Build a condition nested `depth` levels deep, alternating (and ...) and (or ...).
+    """
+    if depth <= 1:
+        literals = []
+        for _ in range(3):
+            atom = f"({rng.choice(predicates)} {rng.choice(params)} {rng.choice(params)})"
+            literals.append(f"(not {atom})" if rng.random() < 0.3 else atom)
+        return "(and " + " ".join(literals) + ")"
+    connective = "and" if depth % 2 else "or"
+    return f"({connective} " + " ".join(_condition(rng, predicates, params, depth - 1) for _ in range(2)) + ")"
+
+def generate_domain(actions: int = 10, predicates: int = 10, depth: int = 1, seed: int = 0) -> str:
+    """
+        Generate a typed STRIPS-style domain.
+
+        Args:
+            actions: Number of action schemas
+            predicates: Number of binary predicates
+            depth: Nesting depth of the action preconditions
+            seed: Random seed
+
+        Returns:
+            str: PDDL domain text
+    """
+    rng = random.Random(seed)
+    names = [f"p{i}" for i in range(predicates)]
+    params = ["?x", "?y", "?z"]
+
+    lines = [
+        "; synthetic benchmark domain",
+        "(define (domain synthetic)",
+        "  (:requirements :strips :typing :negative-preconditions :disjunctive-preconditions)",
+        "  (:types thing place - object)",
+        "  (:predicates " + " ".join(f"({name} ?a - thing ?b - thing)" for name in names) + ")",
+    ]
+    for i in range(actions):
+        add = f"({rng.choice(names)} ?x ?y)"
+        delete = f"(not ({rng.choice(names)} ?y ?z))"
+        lines += [
+            f"  (:action a{i}",
+            "    :parameters (?x - thing ?y - thing ?z - thing)",
+            f"    :precondition {_condition(rng, names, params, depth)}",
+            f"    :effect (and {add} {delete}))",
+        ]
+    lines.append(")")
+    return "\n".join(lines) + "\n"
+
+def generate_problem(objects: int = 100, init: int = 1000, goals: int = 10, predicates: int = 10, seed: int = 0) -> str:
+    """
+        Generate a problem for the domain of generate_domain.
+
+        Args:
+            objects: Number of objects
+            init: Number of :init facts
+            goals: Number of goal facts
+            predicates: Number of predicates of the domain
+            seed: Random seed
+
+        Returns:
+            str: PDDL problem text
+    """
+    rng = random.Random(seed)
+    names = [f"o{i}" for i in range(objects)]
+
+    def fact():
+        return f"(p{rng.randrange(predicates)} {rng.choice(names)} {rng.choice(names)})"
+
+    lines = [
+        "; synthetic benchmark problem",
+        "(define (problem synthetic-1)",
+        "  (:domain synthetic)",
+        "  (:objects " + " ".join(names) + " - thing)",
+        "  (:init",
+    ]
+    lines += [f"    {fact()}" for _ in range(init)]
+    lines += [
+        "  )",
+        "  (:goal (and " + " ".join(fact() for _ in range(goals)) + "))",
+        ")",
+    ]
+    return "\n".join(lines) + "\n"
+
+def generate_plan(length: int = 100, actions: int = 10, objects: int = 100, seed: int = 0) -> str:
+    """
+        Generate a plan of ground steps for the domain and problem above. The plan is not meant to be valid.
+
+        Args:
+            length: Number of plan steps
+            actions: Number of action schemas of the domain
+            objects: Number of objects of the problem
+            seed: Random seed
+
+        Returns:
+            str: Plan text with a cost footer
+    """
+    rng = random.Random(seed)
+    lines = [
+        f"(a{rng.randrange(actions)} o{rng.randrange(objects)} o{rng.randrange(objects)} o{rng.randrange(objects)})"
+        for _ in range(length)
+    ]
+    lines.append(f"; cost = {length} (unit cost)")
+    return "\n".join(lines) + "\n"
+
+def generate(objects: int = 100, init: int = 1000, actions: int = 10, depth: int = 1, plan: int = 100,
+             predicates: int = 10, goals: int = 10, seed: int = 0) -> tuple:
+    """
+        Generate a matching (domain, problem, plan) triple.
+
+        Returns:
+            tuple: (domain_text, problem_text, plan_text)
+    """
+    return (
+        generate_domain(actions=actions, predicates=predicates, depth=depth, seed=seed),
+        generate_problem(objects=objects, init=init, goals=goals, predicates=predicates, seed=seed),
+        generate_plan(length=plan, actions=actions, objects=objects, seed=seed),
+    )
@@ -1,7 +1,47 @@
+from __future__ import annotations
+
+import argparse
+import contextlib
+import functools
+import gzip
+import hashlib
+import io
+import json
+import os
 import re
-from rdflib import Graph, Namespace, URIRef, Literal
-from rdflib.namespace import RDF, RDFS
-import pyodide.http
+import sys
+import time
+import tracemalloc
+from array import array
+
+# rdflib takes most of the import time of this module and is only needed to build,
+# load or query graphs, so it is imported on first use (see _load_rdflib). The parser
+# layer (PDDLParser, DomainFunctions, ProblemFunctions, parse_sexpr) never needs it.
+_RDFLIB_NAMES = ("Graph", "Namespace", "URIRef", "Literal", "BNode", "RDF", "RDFS", "OWL", "XSD", "prepareQuery")
+_rdflib_loaded = False
+
+def _load_rdflib():
+    """
+        Import rdflib and bind the names of _RDFLIB_NAMES in this module, once.
+    """
+    global _rdflib_loaded, Graph, Namespace, URIRef, Literal, BNode, RDF, RDFS, OWL, XSD, prepareQuery, _TRUE
+    if _rdflib_loaded:
+        return
+    from rdflib import Graph, Namespace, URIRef, Literal, BNode
+    from rdflib.namespace import RDF, RDFS, OWL, XSD
+    from rdflib.plugins.sparql import prepareQuery
+    _TRUE = Literal(True)
+    _rdflib_loaded = True
+
+def __getattr__(name):
+    # Keeps "from ontology import Graph" and friends working
+    if name in _RDFLIB_NAMES:
+        _load_rdflib()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Runs of spaces that _remove_pddl_comments turns into one space, after replacing tabs with spaces
+_SPACE_RUN_RE = re.compile(r"  +")
 
 class PDDLParser:
     """
@@ -15,9 +55,11 @@ class PDDLParser:
                 problem_text: Raw PDDL problem file content.
                 plan_text: Optional raw plan file content.
         """
-        self.domain_text = self._remove_pddl_comments(domain_text)
-        self.problem_text = self._remove_pddl_comments(problem_text)
-        self.plan_text = self._remove_pddl_comments(plan_text) if plan_text else ""
+        # Comments are removed on first access, see domain_text and problem_text
+        self._domain_raw = domain_text
+        self._problem_raw = problem_text
+        # Plan comments carry the cost footer, they are skipped by iter_plan_steps
+        self.plan_text = plan_text or ""
         self.data = {}
         self.df = DomainFunctions()
         self.pf = ProblemFunctions()
@@ -29,79 +71,253 @@ class PDDLParser:
             self._parse_plan()
         return self.data
 
-    def _parse_domain(self):
-        name = self.df.get_domain_name(self.domain_text).strip()
+    def run_domain(self) -> dict:
+        """
+            Parse only the domain.
 
-        self.data.setdefault(name, {})
-        text_lower = self.domain_text.lower()
-        self.data[name]["requirements"] = self.df.get_requirements(self.domain_text) if '(:requirements' in text_lower else []
-        self.data[name]["types"] = self.df.get_types(self.domain_text) if '(:types' in text_lower else {}
-        self.data[name]["constants"] = self.df.get_constants(self.domain_text) if '(:constants' in text_lower else {}
-        self.data[name]["predicates"] = self.df.get_predicates(self.domain_text) if '(:predicates' in text_lower else []
-        self.data[name]["actions"] = self.df.get_actions(self.domain_text) if '(:action' in text_lower else {}
+            Returns:
+                dict: {domain_name: {requirements, types, constants, predicates, actions}}
+        """
+        self._parse_domain()
+        return self.data
 
-        self.domain_name = name
+    def run_problem(self, domain_name: str) -> dict:
+        """
+            Parse only the problem and plan, for a domain that was parsed before.
 
-    def _parse_problem(self):
-        problem_name, _ = self.pf.get_problem_name(self.problem_text)
-        problem_name = problem_name.strip()
-        self.problem_name = problem_name
+            Args:
+                domain_name: Name of the previously parsed domain
+
+            Returns:
+                dict: {domain_name: {"Problems": {problem_name: {...}}}}
+        """
+        self.domain_name = domain_name
+        self.data = {domain_name: {}}
+        self._parse_problem()
+        if self.plan_text:
+            self._parse_plan()
+        return self.data
+
+    def run_ir(self) -> "DomainIR":
+        """
+            Parse the domain, problem and plan into the compact DomainIR form instead of dicts of strings.
+
+            Returns:
+                DomainIR: The domain, with the problem in its problems list
+        """
+        symbols = SymbolTable()
+        domain = self._parse_domain_ir(symbols)
+        domain.problems.append(self._parse_problem_ir(symbols))
+        return domain
+
+    def run_problem_ir(self, symbols: "SymbolTable" = None) -> "ProblemIR":
+        """
+            Parse only the problem and plan into the ProblemIR form, see run_problem and run_ir.
+
+            Args:
+                symbols: Optional SymbolTable to share with other parsed problems
+
+            Returns:
+                ProblemIR: The problem and its plan
+        """
+        return self._parse_problem_ir(symbols if symbols is not None else SymbolTable())
+
+    @functools.cached_property
+    def domain_text(self) -> str:
+        text = self._remove_pddl_comments(self._domain_raw)
+        self._domain_raw = None
+        return text
+
+    @functools.cached_property
+    def problem_text(self) -> str:
+        text = self._remove_pddl_comments(self._problem_raw)
+        self._problem_raw = None
+        return text
+
+    # Section accessors, each parsed on first access only. Sections are located through a
+    # SectionIndex, so reading e.g. the objects does not tokenize the :init of the problem.
+
+    @functools.cached_property
+    def domain_name(self) -> str:
+        return self.df.get_domain_name(self.domain_text).strip()
+
+    @functools.cached_property
+    def requirements(self) -> list:
+        return self.df.get_requirements(self.domain_text)
+
+    @functools.cached_property
+    def types(self):
+        return self.df.get_types(self.domain_text)
+
+    @functools.cached_property
+    def constants(self):
+        return self.df.get_constants(self.domain_text)
 
-        text_lower = self.problem_text.lower()
-        objects = self.pf.get_objects(self.problem_text) if '(:objects' in text_lower else []
-        init = self.pf.get_initial_state(self.problem_text) if '(:init' in text_lower else {}
-        goal = self.pf.get_goal_state(self.problem_text) if '(:goal' in text_lower else []
+    @functools.cached_property
+    def predicates(self) -> list:
+        return self.df.get_predicates(self.domain_text)
+
+    @functools.cached_property
+    def actions(self) -> dict:
+        return self.df.get_actions(self.domain_text)
+
+    @functools.cached_property
+    def problem_name(self) -> str:
+        return self.pf.get_problem_name(self.problem_text)[0].strip()
+
+    @functools.cached_property
+    def objects(self):
+        return self.pf.get_objects(self.problem_text)
+
+    @functools.cached_property
+    def init(self) -> list:
+        return self.pf.get_initial_state(self.problem_text)
+
+    @functools.cached_property
+    def goal(self) -> list:
+        return self.pf.get_goal_state(self.problem_text)
+
+    def _parse_domain(self):
+        name = self.domain_name
+        self.data.setdefault(name, {})
+        self.data[name]["requirements"] = self.requirements
+        self.data[name]["types"] = self.types
+        self.data[name]["constants"] = self.constants
+        self.data[name]["predicates"] = self.predicates
+        self.data[name]["actions"] = self.actions
 
+    def _parse_problem(self):
         self.data[self.domain_name].setdefault("Problems", {})
-        self.data[self.domain_name]["Problems"][problem_name] = {
-            "objects": objects,
-            "init": init,
-            "goal": goal
+        self.data[self.domain_name]["Problems"][self.problem_name] = {
+            "objects": self.objects,
+            "init": self.init,
+            "goal": self.goal
         }
 
-    def _parse_plan(self):
+    def _parse_domain_ir(self, symbols: "SymbolTable") -> "DomainIR":
+        text = self.domain_text
+        df = self.df
+        domain = DomainIR(self.domain_name, symbols)
+        domain.requirements = self.requirements
+        domain.types = self.types
+        domain.constants = self.constants
+
+        node = df.section(text, ':predicates')
+        if node is not None:
+            for predicate in node.lists():
+                domain.predicates.append(predicate)
+
+        for node in df.sections(text, ':action'):
+            action_name = node.items[1] if len(node.items) > 1 and isinstance(node.items[1], str) else ""
+            preconditions = AtomTable(symbols)
+            for condition in _conjunct_nodes(node.keyword_value(':precondition')):
+                preconditions.append(condition)
+            effects = AtomTable(symbols)
+            for effect in _conjunct_nodes(node.keyword_value(':effect')):
+                effects.append(effect)
+            domain.actions.append(ActionIR(action_name, df._action_params(node), preconditions, effects))
+        return domain
+
+    def _parse_problem_ir(self, symbols: "SymbolTable") -> "ProblemIR":
+        text = self.problem_text
+        pf = self.pf
+        init = AtomTable(symbols)
+        for fact in _section_fact_nodes(pf.section(text, ':init')):
+            init.append(fact)
+        goal = AtomTable(symbols)
+        for fact in _section_fact_nodes(pf.section(text, ':goal')):
+            goal.append(fact)
+
+        plan = AtomTable(symbols)
+        plan_times = []
+        for action, start, duration in iter_plan_steps(self.plan_text):
+            plan.append_tokens(action[1:-1].split())
+            plan_times.append((start, duration))
+        if not any(start is not None or duration is not None for start, duration in plan_times):
+            plan_times = None
+
+        return ProblemIR(self.problem_name, self.objects, init, goal, plan,
+                         plan_times, plan_cost(self.plan_text) if len(plan) else None)
+
+    def run_parallel(self, workers: int = None, executor=None) -> dict:
+        """
+            Same as run, with the large independent units parsed across a process pool.
+
+            The units are groups of (:action ...) blocks, ranges of top-level :init and
+            :goal atoms and the plan; the rest of the domain and problem is parsed here
+            while the workers run. Results are merged in text order, so the output is
+            the one of run. Sections smaller than PARALLEL_MIN_CHARS, or that cannot be
+            split safely (see _section_content), are parsed here as by run.
+
+            Args:
+                workers: Number of units each large section is split into, and of worker
+                         processes when no executor is given; defaults to the number of CPUs
+                executor: Optional concurrent.futures executor to run the units on
+
+            Returns:
+                dict: Same as run
+        """
+        workers = workers or os.cpu_count() or 1
+        if executor is None:
+            # No worker processes inside Pyodide
+            if workers <= 1 or sys.platform == "emscripten":
+                return self.run()
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return self.run_parallel(workers, executor)
+
+        # Everything is submitted before waiting, so the units of all texts run at the same time
+        # The section offsets are those the lazy accessors read, so units match the sections of run
+        actions = _submit_actions(self.df.index(self.domain_text), executor, workers)
+        problem_index = self.pf.index(self.problem_text)
+        init = _submit_facts(problem_index, ':init', executor, workers)
+        goal = _submit_facts(problem_index, ':goal', executor, workers)
+        plan = None
+        if len(self.plan_text) >= PARALLEL_MIN_CHARS:
+            plan = executor.submit(_plan_step_list, self.plan_text)
+
+        # Results are stored in the lazy section accessors, which _parse_domain and _parse_problem read
+        if actions is not None:
+            merged = {}
+            for chunk in actions:
+                merged.update(chunk)
+            self.actions = merged
+        if init is not None:
+            self.init = [fact for chunk in init for fact in chunk]
+        if goal is not None:
+            self.goal = [fact for chunk in goal for fact in chunk]
+
+        self._parse_domain()
+        self._parse_problem()
+        if self.plan_text:
+            self._parse_plan(plan.result() if plan is not None else None)
+        return self.data
+
+    def _parse_plan(self, steps=None):
         """
             Parse a plan file and extract the sequence of actions.
-            Handles both line-based plans and concatenated strings (DOM text).
+            Handles both line-based plans and concatenated strings (DOM text),
+            timestamped temporal plans and "; cost = ..." footers.
             Ignores PDDL definitions (starting with (:) and headers.
+
+            Args:
+                steps: Optional steps already read with iter_plan_steps
         """
         plan_actions = []
-        
-        # Pre-cleaning: Remove likely PDDL definition blocks if they appear after the plan
-        clean_text = self.plan_text
-        if '(:action' in clean_text:
-            clean_text = clean_text.split('(:action')[0]
-            
-        # Robustly identify all top-level parenthesized groups
-        # We cannot use self.find_parens() directly if it stops at the first group.
-        # We implement a simple stack-based parser here for the plan content.
-        pstack = []
-        
-        for i, c in enumerate(clean_text):
-            if c == '(':
-                pstack.append(i)
-            elif c == ')':
-                if pstack:
-                    start = pstack.pop()
-                    # If stack is empty, we found a top-level group
-                    if not pstack:
-                        segment = clean_text[start:i+1].strip()
-                        
-                        # Filter valid actions:
-                        if segment.startswith('(') and segment.endswith(')') and not segment.startswith('(:') and not segment.startswith(';'):
-                            # Filter out non-action groups like "(output)" or "(plan)"
-                            # Valid actions usually look like (name arg1 arg2)
-                            # We allow alphanumeric, hyphens, underscores, question marks (vars), etc.
-                            if re.match(r'\(\s*[a-zA-Z][\w\-\?\.]*(\s+[a-zA-Z0-9\?\-\._]+)*\s*\)', segment):
-                                # Skip specific noise words
-                                # Some solvers output (output), (plan), (found plan), (problem-name)
-                                lower_seg = segment.lower().replace(" ", "")
-                                if not any(x in lower_seg for x in ['(output)', '(plan)', '(foundplan)', '(:domain']):
-                                    plan_actions.append(segment)
-
-        if plan_actions and hasattr(self, 'problem_name'):
+        plan_times = []
+        for action, start, duration in (steps if steps is not None else iter_plan_steps(self.plan_text)):
+            plan_actions.append(action)
+            plan_times.append((start, duration))
+
+        if plan_actions:
             # Add plan to the problem data
-            self.data[self.domain_name]["Problems"][self.problem_name]["plan"] = plan_actions
+            problem = self.data[self.domain_name]["Problems"][self.problem_name]
+            problem["plan"] = plan_actions
+            if any(start is not None or duration is not None for start, duration in plan_times):
+                problem["plan_times"] = plan_times
+            cost = plan_cost(self.plan_text)
+            if cost is not None:
+                problem["plan_cost"] = cost
 
     def _remove_pddl_comments(self, text: str) -> str:
         """
@@ -115,67 +331,327 @@ class PDDLParser:
         """
         # Remove PDDL comments
         text = re.sub(r";.*$", "", text, flags=re.MULTILINE)
-        # Normalize multiple spaces/tabs to single space
-        text = re.sub(r"[ \t]+", " ", text)
+        # Normalize multiple spaces/tabs to single space; single spaces are left alone
+        text = _SPACE_RUN_RE.sub(" ", text.replace("\t", " "))
         # Remove empty lines
         text = "\n".join(line for line in text.splitlines() if line.strip())
         return text
 
+# Default bound of the token -> URIRef / Literal caches of OntologyBuilder
+TERM_CACHE_SIZE = 1 << 16
+
+# Number of triples OntologyBuilder stages before inserting them into the graph at once
+ADD_BATCH_SIZE = 10000
+
+# Number of plan steps listed in the plan summaries of OntologyBuilder.add_plan
+PLAN_SUMMARY_STEPS = 1000
+
+# Number of facts or objects kept as samples on each aggregate node of a summary graph
+SUMMARY_SAMPLE_SIZE = 5
+
+# An atom, possibly negated: "(p a b)" or "(not (p a b))"
+_ATOM_RE = re.compile(r'\s*\(\s*(?:(not)\s*\(([^()]*)\)|([^()]*))\s*\)\s*$', re.IGNORECASE)
+
 class OntologyBuilder:
     """
         Class to build an ontology from structured PDDL data.
     """
 
-    def __init__(self, graph):
+    def __init__(self, graph, term_cache_size: int = TERM_CACHE_SIZE, batch_size: int = ADD_BATCH_SIZE,
+                 plan_summary_steps: int = PLAN_SUMMARY_STEPS, atom_structure: bool = True, imports: str = None,
+                 summarize_facts: int = None, summarize_objects: int = None, summary_sample: int = SUMMARY_SAMPLE_SIZE):
         """
             Args:
-                graph: RDF Graph object to store the ontology
-        """
+                graph: RDF Graph object to store the ontology, an NTriplesWriter to write
+                       the triples as N-Triples lines without a Graph, or None to only
+                       collect the produced triples in self.emitted
+                term_cache_size: Number of PDDL tokens whose URIRef and Literal are memoized
+                batch_size: Number of triples staged before they are inserted into the graph
+                plan_summary_steps: Number of steps listed in the plan comment and explanation,
+                                    None for all steps and 0 to leave both out
+                atom_structure: Link init, goal, precondition and effect atoms to their predicate
+                                and arguments (see add_atom), besides their label
+                imports: Optional ontology IRI, e.g. PLAN_ONTOLOGY_IRI, that the output declares
+                         with owl:imports (see add_ontology_header)
+                summarize_facts: Summarize the init and goal sections holding more facts than
+                                 this into one node per predicate (see add_fact_summary);
+                                 None keeps every fact
+                summarize_objects: Summarize the objects of problems with more objects than
+                                   this into one node per type (see add_object_summary)
+                summary_sample: Number of facts or objects listed on each summary node
+        """
+        _load_rdflib()
         self.g = graph
         self.planOntology = Namespace('https://purl.org/ai4s/ontology/planning#')
-
-    def build_from_dict(self, data: dict) -> str:
+        # The same object, type and parameter names come back in many elements, so their
+        # terms are memoized instead of running iri_safe and allocating them again
+        self.token_uri = functools.lru_cache(maxsize=term_cache_size)(self._token_uri)
+        self.token_literal = functools.lru_cache(maxsize=term_cache_size)(Literal)
+        # Triples produced through add(), which drops the repeated ones (token types and
+        # labels, links between tokens); triples of add_new() are only kept when collecting
+        self.emitted = set()
+        # Number of new triples produced, see ConversionStats
+        self.produced = 0
+        self.writer = graph if isinstance(graph, NTriplesWriter) else None
+        self.batch_size = batch_size
+        self.plan_summary_steps = plan_summary_steps
+        self.atom_structure = atom_structure
+        self.imports = imports
+        self.summarize_facts = summarize_facts
+        self.summarize_objects = summarize_objects
+        self.summary_sample = summary_sample
+        self._header = BNode()
+        self._predicate_uris = {}
+        self._argument_properties = []
+        self._pending = []
+        self.sink = None
+        self._write_line = None
+        self._written = 0
+        # Bumped whenever staged triples reach the graph, so cached query results are dropped
+        self.version = 0
+        self.queries = QueryCache()
+        # Optional ConversionStats, see ConversionStats.instrument
+        self.stats = None
+
+    def build_from_dict(self, data: dict, format: str = "xml", compress: bool = False):
         """
             Main method to convert parsed PDDL data dictionary into RDF/OWL format.
             
             Args:
                 data: Dictionary containing parsed PDDL domain and problem data
+                format: Output format, "xml" (RDF/XML), "turtle", "nt" or "json-ld"
+                compress: gzip the output
                 
             Returns:
-                str: Serialized RDF/XML representation of the ontology
+                str: Serialized representation of the ontology (RDF/XML by default),
+                     or gzip bytes when compress is set
+        """
+        with _phase(self.stats, "build"):
+            self.add_data(data)
+        return self.serialize(format, compress=compress)
+
+    def build_from_ir(self, domain: "DomainIR", format: str = "xml", compress: bool = False):
+        """
+            Convert a DomainIR (see PDDLParser.run_ir) into RDF/OWL format.
+
+            Returns:
+                str: Serialized representation of the ontology, see build_from_dict
+        """
+        return self.build_from_dict({domain.name: domain.sections()}, format, compress)
+
+    def serialize(self, format: str = "xml", destination=None, compress: bool = False):
+        """
+            Serialize the graph built so far, see serialize_graph.
+        """
+        self.flush()
+        with _phase(self.stats, "serialize"):
+            return serialize_graph(self.g, format, destination, compress)
+
+    def stream_from_dict(self, data: dict, sink, format: str = "nt", graph_name=None) -> int:
+        """
+            Convert parsed PDDL data and write the ontology to a sink line by line, as N-Triples or N-Quads.
+
+            The triples already in the graph (the planning ontology) are written first,
+            then every new triple is written as soon as it is produced. New triples are
+            not stored in the graph, so memory does not grow with a serialized copy of
+            the whole ontology and consumers can start reading before the build ends.
+
+            Args:
+                data: Dictionary containing parsed PDDL domain and problem data
+                sink: File-like object with a write(str) method, or a callable taking each line
+                format: "nt" for N-Triples or "nquads" for N-Quads
+                graph_name: Graph IRI of the N-Quads lines, defaults to the planning ontology IRI
+
+            Returns:
+                int: Number of triples written
+        """
+        if format not in ("nt", "nquads"):
+            raise ValueError(f"Unsupported streaming format: {format!r}")
+        if self.writer is not None:
+            raise TypeError("stream_from_dict needs a Graph, an NTriplesWriter is already a stream of lines")
+        if format == "nquads":
+            graph_name = URIRef(graph_name or PLAN_ONTOLOGY_IRI)
+        else:
+            graph_name = None
+
+        write = sink.write if hasattr(sink, "write") else sink
+        count = 0
+        for line in ntriples_lines(self.g, graph_name):
+            write(line)
+            count += 1
+
+        self.flush()
+        self.sink = sink
+        self._write_line = lambda triple: write(ntriples_line(triple, graph_name))
+        self._written = 0
+        try:
+            with _phase(self.stats, "stream"):
+                self.add_data(data)
+        finally:
+            self.sink = None
+            self._write_line = None
+        return count + self._written
+
+    def add(self, triple):
+        """
+            Stage a triple for the graph, or write it to the sink when streaming.
+
+            Triples are never added or written twice, and triples already in the graph
+            are not written again. Staged triples are inserted with Graph.addN once
+            batch_size of them are pending; call flush() after using the add_* methods
+            directly (add_data and add_domain flush on return).
+        """
+        if self.writer is not None:
+            if self.writer.add(triple):
+                self.produced += 1
+            return
+        if triple in self.emitted:
+            return
+        self.emitted.add(triple)
+        self.produced += 1
+        self._stage(triple)
+
+    def add_new(self, triple):
+        """
+            Same as add, for a triple that cannot have been produced before: one about a
+            precondition, effect, fact or plan step, whose URI is derived from its content
+            or position. It is staged or written without being remembered, so that only
+            the graph (which drops repeated triples itself) holds it; it is only kept in
+            self.emitted when the builder collects its triples without a graph.
+        """
+        self.produced += 1
+        if self.writer is not None:
+            self.writer.write(triple)
+            return
+        if self.g is None:
+            self.emitted.add(triple)
+        self._stage(triple)
+
+    def _stage(self, triple):
+        if self.sink is not None:
+            if triple not in self.g:
+                self._write_line(triple)
+                self._written += 1
+        elif self.g is not None:
+            self._pending.append(triple)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """
+            Insert the staged triples into the graph.
+        """
+        if self._pending:
+            graph = self.g
+            graph.addN((s, p, o, graph) for s, p, o in self._pending)
+            self._pending = []
+            self.version += 1
+
+    def query(self, query: str, bindings: dict = None):
+        """
+            Run a SPARQL query against the graph built so far, see QueryCache.query.
+
+            Results are cached until the builder adds triples; changes made to the
+            graph from outside the builder are not noticed.
+        """
+        if self.writer is not None:
+            raise TypeError("SPARQL queries need a Graph, not an NTriplesWriter")
+        self.flush()
+        return self.queries.query(self.g, self.version, query, bindings)
+
+    def add_data(self, data: dict):
+        """
+            Add the triples of parsed PDDL data (domains, their problems and plans).
+
+            Args:
+                data: Dictionary containing parsed PDDL domain and problem data
         """
         for domain_instance in data:
-            # Create URI for the domain and add basic RDF triples
-            itemURI = URIRef(self.planOntology + self.iri_safe(domain_instance))
-            self.g.add((itemURI, RDF.type, self.planOntology.domain))
-            self.g.add((itemURI, RDFS.label, Literal(domain_instance)))
+            self.add_domain(domain_instance, data[domain_instance])
+
+    def add_ir(self, domain: "DomainIR"):
+        """
+            Add the triples of a DomainIR, reading its atom tables one expression at a time.
+
+            Returns:
+                URIRef: URI of the domain
+        """
+        return self.add_domain(domain.name, domain.sections())
+
+    def add_domain(self, domain_instance, domain_data: dict):
+        """
+            Add one parsed domain and the problems it contains.
+
+            Args:
+                domain_instance: Domain name
+                domain_data: Parsed sections of the domain, with an optional "Problems" entry
+
+            Returns:
+                URIRef: URI of the domain
+        """
+        if self.imports is not None:
+            self.add_ontology_header()
 
-            for domain_instance_property in data[domain_instance]:
-                class_name, property_name = self.get_class_name(domain_instance_property)
-                values = data[domain_instance][domain_instance_property]
+        # Create URI for the domain and add basic RDF triples
+        itemURI = self.token_uri(domain_instance)
+        self.add((itemURI, RDF.type, self.planOntology.domain))
+        self.add((itemURI, RDFS.label, self.token_literal(domain_instance)))
 
-                if domain_instance_property == 'requirements':
-                    self.add_requirements(class_name, property_name, itemURI, values)
+        for domain_instance_property in domain_data:
+            class_name, property_name = self.get_class_name(domain_instance_property)
+            values = domain_data[domain_instance_property]
 
-                elif domain_instance_property == 'types':
-                    self.add_types(class_name, property_name, itemURI, values)
+            if domain_instance_property == 'requirements':
+                self.add_requirements(class_name, property_name, itemURI, values)
 
-                elif domain_instance_property == 'constants':
-                    self.add_constants(class_name, property_name, itemURI, values)
+            elif domain_instance_property == 'types':
+                self.add_types(class_name, property_name, itemURI, values)
 
-                elif domain_instance_property == 'predicates':
-                    self.add_predicates(class_name, property_name, itemURI, values)
+            elif domain_instance_property == 'constants':
+                self.add_constants(class_name, property_name, itemURI, values)
 
-                elif domain_instance_property == 'actions':
-                    self.add_actions(class_name, property_name, itemURI, values)
+            elif domain_instance_property == 'predicates':
+                self.add_predicates(class_name, property_name, itemURI, values)
 
-                elif domain_instance_property == 'Problems':
-                    self.add_problem(class_name, property_name, itemURI, values)
+            elif domain_instance_property == 'actions':
+                self.add_actions(class_name, property_name, itemURI, values)
+
+            elif domain_instance_property == 'Problems':
+                self.add_problem(class_name, property_name, itemURI, values)
+
+        self.flush()
+        return itemURI
+
+    def add_ontology_header(self):
+        """
+            Declare the output as an (anonymous) owl:Ontology that imports self.imports, so
+            that a file holding only the instances still resolves the planning ontology terms.
+        """
+        self.add((self._header, RDF.type, OWL.Ontology))
+        self.add((self._header, OWL.imports, URIRef(self.imports)))
+
+    def _token_uri(self, token):
+        return URIRef(self.planOntology + self.iri_safe(token))
+
+    def term_cache_stats(self) -> dict:
+        """
+            Report the use of the token_uri and token_literal caches.
 
-        # Serialize the completed graph to RDF/XML format
-        owl_bytes = self.g.serialize(format="application/rdf+xml", encoding="utf-8")
-        owl_string = owl_bytes.decode("utf-8")
-        return owl_string
+            Returns:
+                dict: {"uri": {...}, "literal": {...}} with hits, misses, size, maxsize and hit_rate
+        """
+        stats = {}
+        for name, cache in (("uri", self.token_uri), ("literal", self.token_literal)):
+            info = cache.cache_info()
+            lookups = info.hits + info.misses
+            stats[name] = {
+                "hits": info.hits,
+                "misses": info.misses,
+                "size": info.currsize,
+                "maxsize": info.maxsize,
+                "hit_rate": info.hits / lookups if lookups else 0.0,
+            }
+        return stats
 
     def iri_safe(self, local):
         """
@@ -186,6 +662,57 @@ class OntologyBuilder:
         local = re.sub(r"[^\w\-\.]", "_", local)
         return local
 
+    def content_id(self, expression):
+        """
+            Short digest of a PDDL expression, used to build URIs that only change when the expression does.
+            Whitespace differences do not change the digest.
+        """
+        return hashlib.sha1(" ".join(expression.split()).encode("utf-8")).hexdigest()[:12]
+
+    def content_uris(self, prefix, expressions):
+        """
+            Yield (URI, expression, parts) for the distinct expressions of a section, with URIs derived
+            from their content. Repeated expressions are skipped, so the triples that add_new
+            produces for a URI are produced once.
+
+            When expressions is an AtomTable, parts is read from the symbol ids (see AtomTable.atom),
+            otherwise it is None. The URIs are the same either way, as the digest is that of the text.
+        """
+        ids = set()
+        table = expressions if isinstance(expressions, AtomTable) else None
+        for index, expression in enumerate(expressions):
+            content_id = self.content_id(expression)
+            if content_id not in ids:
+                ids.add(content_id)
+                yield URIRef(prefix + content_id), expression, table.atom(index) if table is not None else None
+
+    def atom_name(self, expression):
+        """
+            Return the predicate name of an atom such as "(on ?x - block ?y - block)".
+        """
+        tokens = expression.replace('(', ' ').split()
+        return tokens[0] if tokens else expression
+
+    def predicate_uri(self, domain_name, name):
+        """
+            URI of the predicate `name` of a domain: predicate names are unique within a domain, so they give a stable URI.
+            PDDL names are case-insensitive, so "(ON a b)" in a problem links to the predicate declared as "(on ?x ?y)".
+        """
+        key = (domain_name, name)
+        uri = self._predicate_uris.get(key)
+        if uri is None:
+            uri = self._predicate_uris[key] = URIRef(self.planOntology + domain_name + '_predicate_' + self.iri_safe(name.lower()))
+        return uri
+
+    def argument_property(self, position):
+        """
+            Property linking an atom to its argument at a 1-based position (hasArgument1, hasArgument2, ...).
+        """
+        properties = self._argument_properties
+        while len(properties) < position:
+            properties.append(self.planOntology[f"hasArgument{len(properties) + 1}"])
+        return properties[position - 1]
+
     def get_class_name(self, input_string):
         """
             Map PDDL property names to corresponding ontology classes and properties.
@@ -211,10 +738,10 @@ class OntologyBuilder:
             Add PDDL requirements (e.g., :strips, :typing) to the ontology.
         """
         for value in data:
-            value_URI = URIRef(self.planOntology + self.iri_safe(value))
-            self.g.add((value_URI, RDF.type, class_name))
-            self.g.add((value_URI, RDFS.label, Literal(value)))
-            self.g.add((itemURI, property_name, value_URI))
+            value_URI = self.token_uri(value)
+            self.add((value_URI, RDF.type, class_name))
+            self.add((value_URI, RDFS.label, self.token_literal(value)))
+            self.add((itemURI, property_name, value_URI))
 
     def add_types(self, class_name, property_name, itemURI, data):
         """
@@ -223,23 +750,23 @@ class OntologyBuilder:
         if isinstance(data, dict):
             for tag, values in data.items():
                 # Create URI for the parent type
-                tag_URI = URIRef(self.planOntology + self.iri_safe(tag))
-                self.g.add((tag_URI, RDF.type, self.planOntology.type_tag))
-                self.g.add((tag_URI, RDFS.label, Literal(tag)))
+                tag_URI = self.token_uri(tag)
+                self.add((tag_URI, RDF.type, self.planOntology.type_tag))
+                self.add((tag_URI, RDFS.label, self.token_literal(tag)))
 
                 # Add each subtype and link it to parent type
                 for value in values:
-                    value_URI = URIRef(self.planOntology + self.iri_safe(value))
-                    self.g.add((value_URI, RDF.type, class_name))
-                    self.g.add((value_URI, RDFS.label, Literal(value)))
-                    self.g.add((value_URI, self.planOntology.hasTag, tag_URI))
-                    self.g.add((itemURI, property_name, value_URI))
+                    value_URI = self.token_uri(value)
+                    self.add((value_URI, RDF.type, class_name))
+                    self.add((value_URI, RDFS.label, self.token_literal(value)))
+                    self.add((value_URI, self.planOntology.hasTag, tag_URI))
+                    self.add((itemURI, property_name, value_URI))
         else:
             for value in data:
-                value_URI = URIRef(self.planOntology + self.iri_safe(value))
-                self.g.add((value_URI, RDF.type, class_name))
-                self.g.add((value_URI, RDFS.label, Literal(value)))
-                self.g.add((itemURI, property_name, value_URI))
+                value_URI = self.token_uri(value)
+                self.add((value_URI, RDF.type, class_name))
+                self.add((value_URI, RDFS.label, self.token_literal(value)))
+                self.add((itemURI, property_name, value_URI))
 
     def add_constants(self, class_name, property_name, itemURI, data):
         """
@@ -248,48 +775,49 @@ class OntologyBuilder:
         if isinstance(data, dict):
             for values in data.values():
                 for value in values:
-                    value_URI = URIRef(self.planOntology + self.iri_safe(value))
-                    self.g.add((value_URI, RDF.type, class_name))
-                    self.g.add((value_URI, RDFS.label, Literal(value)))
-                    self.g.add((itemURI, property_name, value_URI))
+                    value_URI = self.token_uri(value)
+                    self.add((value_URI, RDF.type, class_name))
+                    self.add((value_URI, RDFS.label, self.token_literal(value)))
+                    self.add((itemURI, property_name, value_URI))
         else:
             # Handle untyped constants
             for value in data:
-                value_URI = URIRef(self.planOntology + self.iri_safe(value))
-                self.g.add((value_URI, RDF.type, class_name))
-                self.g.add((value_URI, RDFS.label, Literal(value)))
-                self.g.add((itemURI, property_name, value_URI))
+                value_URI = self.token_uri(value)
+                self.add((value_URI, RDF.type, class_name))
+                self.add((value_URI, RDFS.label, self.token_literal(value)))
+                self.add((itemURI, property_name, value_URI))
 
     def add_predicates(self, class_name, property_name, itemURI, data):
         """
             Add PDDL predicates to the ontology.
         """
-        for i, value in enumerate(data, 1):
-            # Generate unique URI for each predicate
-            value_URI = URIRef(self.planOntology + itemURI.split('#')[-1] + f'_predicate_{i}')
-            self.g.add((value_URI, RDF.type, class_name))
-            self.g.add((value_URI, RDFS.label, Literal(value)))
-            self.g.add((itemURI, property_name, value_URI))
+        domain_name = itemURI.split('#')[-1]
+        for value in data:
+            value_URI = self.predicate_uri(domain_name, self.atom_name(value))
+            self.add((value_URI, RDF.type, class_name))
+            self.add((value_URI, RDFS.label, Literal(value)))
+            self.add((itemURI, property_name, value_URI))
 
     def add_actions(self, class_name, property_name, itemURI, data):
         """
             Add PDDL actions to the ontology.
         """
+        domain_name = itemURI.split('#')[-1]
         for action, items in data.items():
             # Create URI and basic triples for the action
-            action_URI = URIRef(self.planOntology + self.iri_safe(action))
-            self.g.add((action_URI, RDF.type, class_name))
-            self.g.add((action_URI, RDFS.label, Literal(action)))
-            self.g.add((itemURI, property_name, action_URI))
+            action_URI = self.token_uri(action)
+            self.add((action_URI, RDF.type, class_name))
+            self.add((action_URI, RDFS.label, self.token_literal(action)))
+            self.add((itemURI, property_name, action_URI))
 
             # Add action components (parameters, preconditions, effects)
             for key, value in items.items():
                 if key == 'parameters':
                     self.add_parameters(self.planOntology.parameter, self.planOntology.hasParameter, action_URI, value)
                 elif key == 'preconditions':
-                    self.add_preconditions(self.planOntology.precondition, self.planOntology.hasPrecondition, action_URI, value)
+                    self.add_preconditions(self.planOntology.precondition, self.planOntology.hasPrecondition, action_URI, value, domain_name)
                 elif key == 'effect':
-                    self.add_effects(self.planOntology.effect, self.planOntology.hasEffect, action_URI, value)
+                    self.add_effects(self.planOntology.effect, self.planOntology.hasEffect, action_URI, value, domain_name)
 
     def add_parameters(self, class_name, property_name, itemURI, data):
         """
@@ -299,168 +827,480 @@ class OntologyBuilder:
         types = data.get("types", []) # Parameter types (e.g., car, location)
 
         for i, value in enumerate(values):
-            value_URI = URIRef(self.planOntology + self.iri_safe(value))
-            self.g.add((value_URI, RDF.type, class_name))
-            self.g.add((value_URI, RDFS.label, Literal(value)))
-            self.g.add((itemURI, property_name, value_URI))
+            value_URI = self.token_uri(value)
+            self.add((value_URI, RDF.type, class_name))
+            self.add((value_URI, RDFS.label, self.token_literal(value)))
+            self.add((itemURI, property_name, value_URI))
             
-            # Link parameter to its type if type information is available
+            # Link parameter to its type if type information is available,
+            # and to every member of an (either ...) type
             if i < len(types):
-                type_URI = URIRef(self.planOntology + self.iri_safe(types[i]))
-                self.g.add((type_URI, RDF.type, self.planOntology.type))
-                self.g.add((type_URI, RDFS.label, Literal(types[i])))
-                self.g.add((value_URI, self.planOntology.ofType, type_URI))
+                for param_type in (types[i] if isinstance(types[i], list) else [types[i]]):
+                    type_URI = self.token_uri(param_type)
+                    self.add((type_URI, RDF.type, self.planOntology.type))
+                    self.add((type_URI, RDFS.label, self.token_literal(param_type)))
+                    self.add((value_URI, self.planOntology.ofType, type_URI))
 
-    def add_preconditions(self, class_name, property_name, itemURI, data):
+    def add_preconditions(self, class_name, property_name, itemURI, data, domain_name=None):
         """
             Add action preconditions to the ontology.
         """
-        for i, value in enumerate(data, 1):
-            # Generate unique URI for each precondition
-            uri = URIRef(self.planOntology + itemURI.split('#')[-1] + f'_precondition_{i}')
-            self.g.add((uri, RDF.type, class_name))
-            self.g.add((uri, RDFS.label, Literal(value)))
-            self.g.add((itemURI, property_name, uri))
+        prefix = self.planOntology + itemURI.split('#')[-1] + '_precondition_'
+        structure = self.atom_structure and domain_name is not None
+        # URIs are derived from the content of each precondition
+        for uri, value, parts in self.content_uris(prefix, data):
+            self.add_new((uri, RDF.type, class_name))
+            self.add_new((uri, RDFS.label, Literal(value)))
+            self.add_new((itemURI, property_name, uri))
+            if structure:
+                self.add_atom(uri, domain_name, value, parts)
 
-    def add_effects(self, class_name, property_name, itemURI, data):
+    def add_effects(self, class_name, property_name, itemURI, data, domain_name=None):
         """
             Add action effects to the ontology.
         """
-        for i, value in enumerate(data, 1):
-            # Generate unique URI for each effect
-            uri = URIRef(self.planOntology + itemURI.split('#')[-1] + f'_effect_{i}')
-            self.g.add((uri, RDF.type, class_name))
-            self.g.add((uri, RDFS.label, Literal(value)))
-            self.g.add((itemURI, property_name, uri))
+        prefix = self.planOntology + itemURI.split('#')[-1] + '_effect_'
+        structure = self.atom_structure and domain_name is not None
+        # URIs are derived from the content of each effect
+        for uri, value, parts in self.content_uris(prefix, data):
+            self.add_new((uri, RDF.type, class_name))
+            self.add_new((uri, RDFS.label, Literal(value)))
+            self.add_new((itemURI, property_name, uri))
+            if structure:
+                self.add_atom(uri, domain_name, value, parts)
 
     def add_problem(self, class_name, property_name, itemURI, data):
         """
             Add PDDL problems instances to the ontology.
+
+            data maps problem names to parsed problems, or is an iterable of
+            (problem_name, problem) pairs that is consumed one problem at a time.
         """
-        for problem_name, items in data.items():
+        problems = data.items() if isinstance(data, dict) else data
+        domain_name = itemURI.split('#')[-1]
+        for problem_name, items in problems:
             # Create URI and basic triples for the problem
-            problem_URI = URIRef(self.planOntology + self.iri_safe(problem_name))
-            self.g.add((problem_URI, RDF.type, class_name))
-            self.g.add((problem_URI, RDFS.label, Literal(problem_name)))
-            self.g.add((itemURI, property_name, problem_URI))
+            problem_URI = self.token_uri(problem_name)
+            self.add((problem_URI, RDF.type, class_name))
+            self.add((problem_URI, RDFS.label, self.token_literal(problem_name)))
+            self.add((itemURI, property_name, problem_URI))
 
             # Add problem components (objects, initial state, goal state, plan)
             for key, value in items.items():
                 if key == "objects":
-                    self.add_objects(self.planOntology.object, self.planOntology.hasObject, problem_URI, itemURI.split('#')[-1], value)
+                    self.add_objects(self.planOntology.object, self.planOntology.hasObject, problem_URI, domain_name, value)
                 elif key == "init":
-                    self.add_initial_state(self.planOntology.initial_state, self.planOntology.hasInitialState, problem_URI, value)
+                    self.add_initial_state(self.planOntology.initial_state, self.planOntology.hasInitialState, problem_URI, value, domain_name)
                 elif key == "goal":
-                    self.add_goal_state(self.planOntology.goal_state, self.planOntology.hasGoalState, problem_URI, value)
+                    self.add_goal_state(self.planOntology.goal_state, self.planOntology.hasGoalState, problem_URI, value, domain_name)
                 elif key == "plan":
-                    self.add_plan(problem_URI, problem_name, value)
+                    self.add_plan(problem_URI, problem_name, value, items.get("plan_times"), items.get("plan_cost"))
 
     def add_objects(self, class_name, property_name, itemURI, domain_name, data):
         """
             Add problem objects to the ontology.
         """
+        threshold = self.summarize_objects
+        if threshold is not None:
+            count = sum(map(len, data.values())) if isinstance(data, dict) else len(data)
+            if count > threshold:
+                self.add_object_summary(class_name, property_name, itemURI, domain_name, data)
+                return
+
         if isinstance(data, dict):
             # Handle typed objects
             for obj_type, values in data.items():
                 # Create type URI and link to domain
-                type_URI = URIRef(self.planOntology + self.iri_safe(obj_type))
-                self.g.add((type_URI, RDF.type, self.planOntology.type))
-                self.g.add((type_URI, RDFS.label, Literal(obj_type)))
-                self.g.add((URIRef(self.planOntology + domain_name), self.planOntology.hasType, type_URI))
+                type_URI = self.token_uri(obj_type)
+                self.add((type_URI, RDF.type, self.planOntology.type))
+                self.add((type_URI, RDFS.label, self.token_literal(obj_type)))
+                self.add((URIRef(self.planOntology + domain_name), self.planOntology.hasType, type_URI))
                 
                 # Add each object and link to its type
                 for value in values:
-                    value_URI = URIRef(self.planOntology + self.iri_safe(value))
-                    self.g.add((value_URI, RDF.type, class_name))
-                    self.g.add((value_URI, RDFS.label, Literal(value)))
-                    self.g.add((itemURI, property_name, value_URI))
-                    self.g.add((type_URI, self.planOntology.hasTypeInstance, value_URI))
+                    value_URI = self.token_uri(value)
+                    self.add((value_URI, RDF.type, class_name))
+                    self.add((value_URI, RDFS.label, self.token_literal(value)))
+                    self.add((itemURI, property_name, value_URI))
+                    self.add((type_URI, self.planOntology.hasTypeInstance, value_URI))
         else:
             # Handle untyped objects
             for value in data:
-                value_URI = URIRef(self.planOntology + self.iri_safe(value))
-                self.g.add((value_URI, RDF.type, class_name))
-                self.g.add((value_URI, RDFS.label, Literal(value)))
-                self.g.add((itemURI, property_name, value_URI))
+                value_URI = self.token_uri(value)
+                self.add((value_URI, RDF.type, class_name))
+                self.add((value_URI, RDFS.label, self.token_literal(value)))
+                self.add((itemURI, property_name, value_URI))
 
-    def add_initial_state(self, class_name, property_name, itemURI, data):
+    def add_initial_state(self, class_name, property_name, itemURI, data, domain_name=None):
         """
             Add initial state facts to the ontology.
         """
-        for i, value in enumerate(data, 1):
-            uri = URIRef(self.planOntology + itemURI.split('#')[-1] + f'_initial_state_{i}')
-            self.g.add((uri, RDF.type, class_name))
-            self.g.add((uri, RDFS.label, Literal(value)))
-            self.g.add((itemURI, property_name, uri))
+        prefix = self.planOntology + itemURI.split('#')[-1] + '_initial_state_'
+        if self.summarize_facts is not None and len(data) > self.summarize_facts:
+            self.add_fact_summary(class_name, property_name, itemURI, data, prefix, domain_name)
+            return
+        structure = self.atom_structure and domain_name is not None
+        for uri, value, parts in self.content_uris(prefix, data):
+            self.add_new((uri, RDF.type, class_name))
+            self.add_new((uri, RDFS.label, Literal(value)))
+            self.add_new((itemURI, property_name, uri))
+            if structure:
+                self.add_atom(uri, domain_name, value, parts)
 
-    def add_goal_state(self, class_name, property_name, itemURI, data):
+    def add_goal_state(self, class_name, property_name, itemURI, data, domain_name=None):
         """
             Add goal state conditions to the ontology.
         """
-        for i, value in enumerate(data, 1):
-            uri = URIRef(self.planOntology + itemURI.split('#')[-1] + f'_goal_state_{i}')
-            self.g.add((uri, RDF.type, class_name))
-            self.g.add((uri, RDFS.label, Literal(value)))
-            self.g.add((itemURI, property_name, uri))
+        prefix = self.planOntology + itemURI.split('#')[-1] + '_goal_state_'
+        if self.summarize_facts is not None and len(data) > self.summarize_facts:
+            self.add_fact_summary(class_name, property_name, itemURI, data, prefix, domain_name)
+            return
+        structure = self.atom_structure and domain_name is not None
+        for uri, value, parts in self.content_uris(prefix, data):
+            self.add_new((uri, RDF.type, class_name))
+            self.add_new((uri, RDFS.label, Literal(value)))
+            self.add_new((itemURI, property_name, uri))
+            if structure:
+                self.add_atom(uri, domain_name, value, parts)
+
+    def add_fact_summary(self, class_name, property_name, itemURI, data, prefix, domain_name=None):
+        """
+            Add init or goal facts as one aggregate node per predicate (and polarity) instead of one node per fact.
+
+            Each node is of class_name like the facts it stands for, is labelled e.g.
+            "(on ...) x 1200", and carries isAggregate, hasCount, the first summary_sample
+            facts as hasSample literals and, with atom_structure, its ofPredicate link.
+        """
+        groups = {}
+        table = data if isinstance(data, AtomTable) else None
+        for index, value in enumerate(data):
+            parts = table.atom(index) if table is not None else self.atom_parts(value)
+            if parts is not None:
+                negated, tokens = parts
+                key = (negated, tokens[0].lower() if tokens else "")
+            else:
+                key = (False, self.atom_name(value).lower())
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = [0, []]
+            group[0] += 1
+            if len(group[1]) < self.summary_sample:
+                group[1].append(value)
+
+        po = self.planOntology
+        structure = self.atom_structure and domain_name is not None
+        for (negated, name), (count, samples) in groups.items():
+            uri = URIRef(prefix + 'group_' + ('not_' if negated else '') + self.iri_safe(name))
+            pattern = f"(not ({name} ...))" if negated else f"({name} ...)"
+            self.add((uri, RDF.type, class_name))
+            self.add((uri, RDFS.label, Literal(f"{pattern} x {count}")))
+            self.add((uri, po.isAggregate, _TRUE))
+            self.add((uri, po.hasCount, Literal(count)))
+            for sample in samples:
+                self.add((uri, po.hasSample, Literal(sample)))
+            self.add((itemURI, property_name, uri))
+            if structure and name and name != '=':
+                self.add((uri, po.ofPredicate, self.predicate_uri(domain_name, name)))
+                if negated:
+                    self.add((uri, po.isNegated, _TRUE))
+
+    def add_object_summary(self, class_name, property_name, itemURI, domain_name, data):
+        """
+            Add problem objects as one aggregate node per type instead of one node per object.
+
+            Each node is of class_name, labelled e.g. "block x 5000", linked from its type
+            with hasTypeInstance and carries isAggregate, hasCount and the first
+            summary_sample object names as hasSample literals. Untyped objects are grouped
+            under "object".
+        """
+        po = self.planOntology
+        prefix = po + itemURI.split('#')[-1] + '_objects_'
+        groups = data.items() if isinstance(data, dict) else [(None, data)]
+        for obj_type, values in groups:
+            uri = URIRef(prefix + self.iri_safe(obj_type or "object"))
+            self.add((uri, RDF.type, class_name))
+            self.add((uri, RDFS.label, Literal(f"{obj_type or 'object'} x {len(values)}")))
+            self.add((uri, po.isAggregate, _TRUE))
+            self.add((uri, po.hasCount, Literal(len(values))))
+            for value in values[:self.summary_sample]:
+                self.add((uri, po.hasSample, self.token_literal(value)))
+            self.add((itemURI, property_name, uri))
+
+            if obj_type is not None:
+                type_URI = self.token_uri(obj_type)
+                self.add((type_URI, RDF.type, po.type))
+                self.add((type_URI, RDFS.label, self.token_literal(obj_type)))
+                self.add((URIRef(po + domain_name), po.hasType, type_URI))
+                self.add((type_URI, po.hasTypeInstance, uri))
+
+    def atom_parts(self, expression):
+        """
+            Split an atom "(p a b)" or negated atom "(not (p a b))" into its parts.
+
+            Returns:
+                tuple: (negated, tokens) e.g. (False, ["p", "a", "b"]), None for other expressions
+        """
+        match = _ATOM_RE.match(expression)
+        if match is None:
+            return None
+        negated, inner, plain = match.groups()
+        return negated is not None, (inner if negated else plain).split()
+
+    def add_atom(self, atom_URI, domain_name, expression, parts=None):
+        """
+            Describe an atom "(p a b)" or negated atom "(not (p a b))" by its parts:
+            a link to the predicate of the domain, one hasArgumentN link per argument
+            (to the object, constant or parameter URI) and isNegated true for negations.
+            Other expressions (numeric comparisons, quantifiers, ...) only keep their label.
+
+            parts, when already known (see content_uris), saves matching the expression.
+        """
+        if parts is None:
+            parts = self.atom_parts(expression)
+            if parts is None:
+                return
+        negated, tokens = parts
+        if not tokens or tokens[0] == '=':
+            return
+
+        po = self.planOntology
+        self.add_new((atom_URI, po.ofPredicate, self.predicate_uri(domain_name, tokens[0])))
+        for position, argument in enumerate(tokens[1:], 1):
+            self.add_new((atom_URI, self.argument_property(position), self.token_uri(argument)))
+        if negated:
+            self.add_new((atom_URI, po.isNegated, _TRUE))
 
-    def add_plan(self, problem_URI, problem_name, plan_actions):
+    def add_plan(self, problem_URI, problem_name, plan_actions, plan_times=None, plan_cost=None):
         """
             Add a plan and its actions to the ontology.
 
+            The plan is read in one pass, so plan_actions may be any iterable. The
+            rdfs:comment and explanation summaries list at most plan_summary_steps steps.
+
             Args:
                 problem_URI: URI of the planning problem
                 problem_name: Name of the problem
-                plan_actions: List of plan action strings (e.g., "(move robot1 loc1 loc2)")
+                plan_actions: Iterable of plan action strings (e.g., "(move robot1 loc1 loc2)")
+                plan_times: Optional list of (start_time, duration) per step, for temporal plans
+                plan_cost: Optional plan cost read from the plan file, defaults to the number of steps
         """
         # Use DUL Plan class as referenced in the ontology
         DUL = Namespace('http://www.ontologydesignpatterns.org/ont/dul/DUL.owl#')
+        po = self.planOntology
 
         # Create Plan instance
-        plan_URI = URIRef(self.planOntology + self.iri_safe(problem_name) + '_plan')
-        self.g.add((plan_URI, RDF.type, DUL.Plan))
-        
-        step_count = len(plan_actions)
-        plan_label = f"Plan for {problem_name} ({step_count} steps)"
-        self.g.add((plan_URI, RDFS.label, Literal(plan_label)))
+        plan_URI = URIRef(po + self.iri_safe(problem_name) + '_plan')
+        self.add_new((plan_URI, RDF.type, DUL.Plan))
 
         # Link problem to plan using hasPlan property
-        self.g.add((problem_URI, self.planOntology.hasPlan, plan_URI))
-
-        # Add plan cost (number of actions)
-        from rdflib.namespace import XSD
-        self.g.add((plan_URI, self.planOntology.hasPlanCost, Literal(step_count, datatype=XSD.nonNegativeInteger)))
-
-        # Create a formatted string for the entire plan (for display in popup)
-        plan_text = ""
-        explanation_text = f"The plan consists of {step_count} steps: "
-        
-        for i, action in enumerate(plan_actions, 1):
-            plan_text += f"{i}. {action}\n"
-            explanation_text += f"{i}. {action}, "
-        
-        # Remove trailing comma and space
+        self.add_new((problem_URI, po.hasPlan, plan_URI))
+
+        # Add each plan step as a plan action
+        # Step numbers are assigned sequentially starting from 1
+        step_prefix = po + self.iri_safe(problem_name) + '_plan_step_'
+        limit = self.plan_summary_steps
+        summary = []
+        step_count = 0
+        for step_count, action in enumerate(plan_actions, 1):
+            step_URI = URIRef(step_prefix + str(step_count))
+            self.add_new((step_URI, RDF.type, po.plan_step))
+            # Label is just the action string, step number is separate data property
+            self.add_new((step_URI, RDFS.label, Literal(action)))
+            # Use Literal without explicit datatype - rdflib auto-detects int
+            self.add_new((step_URI, po.hasStepNumber, Literal(step_count)))
+            self.add_new((plan_URI, po.hasPlanStep, step_URI))
+
+            if plan_times is not None:
+                start, duration = plan_times[step_count - 1]
+                if start is not None:
+                    self.add_new((step_URI, po.hasStartTime, Literal(start)))
+                if duration is not None:
+                    self.add_new((step_URI, po.hasDuration, Literal(duration)))
+
+            if limit is None or step_count <= limit:
+                summary.append(f"{step_count}. {action}")
+
+        plan_label = f"Plan for {problem_name} ({step_count} steps)"
+        self.add_new((plan_URI, RDFS.label, Literal(plan_label)))
+
+        # Add plan cost (number of actions, unless the plan file states it)
+        if plan_cost is None or (plan_cost >= 0 and plan_cost == int(plan_cost)):
+            cost = step_count if plan_cost is None else int(plan_cost)
+            self.add_new((plan_URI, po.hasPlanCost, Literal(cost, datatype=XSD.nonNegativeInteger)))
+        else:
+            self.add_new((plan_URI, po.hasPlanCost, Literal(str(plan_cost), datatype=XSD.decimal)))
+
+        if limit == 0:
+            return
+
+        # Create a formatted string for the plan (for display in popup) and
+        # a natural language explanation, both cut after `limit` steps
+        omitted = step_count - len(summary)
         if step_count > 0:
-            explanation_text = explanation_text[:-2] + "."
+            plan_text = "\n".join(summary)
+            explanation_text = f"The plan consists of {step_count} steps: " + ", ".join(summary)
+            if omitted:
+                plan_text += f"\n... ({omitted} more steps)"
+                explanation_text += f", ... and {omitted} more steps."
+            else:
+                explanation_text += "."
+            # Add the formatted plan as a comment
+            self.add_new((plan_URI, RDFS.comment, Literal(plan_text)))
         else:
             explanation_text = "The plan contains no steps."
 
-        # Add the formatted plan as a comment
-        if plan_text:
-            self.g.add((plan_URI, RDFS.comment, Literal(plan_text.strip())))
-            
         # Add natural language explanation as hasPlanExplanation property
-        self.g.add((plan_URI, self.planOntology.hasPlanExplanation, Literal(explanation_text, datatype=XSD.string)))
+        self.add_new((plan_URI, po.hasPlanExplanation, Literal(explanation_text, datatype=XSD.string)))
 
-        # Add each plan step as a plan action
-        # Step numbers are assigned sequentially starting from 1
-        for step_number, action in enumerate(plan_actions, 1):
-            step_URI = URIRef(self.planOntology + self.iri_safe(problem_name) + f'_plan_step_{step_number}')
-            self.g.add((step_URI, RDF.type, self.planOntology.plan_step))
-            # Label is just the action string, step number is separate data property
-            self.g.add((step_URI, RDFS.label, Literal(action)))
-            # Use Literal without explicit datatype - rdflib auto-detects int
-            self.g.add((step_URI, self.planOntology.hasStepNumber, Literal(step_number)))
-            self.g.add((plan_URI, self.planOntology.hasPlanStep, step_URI))
+def _nt_literal(value: str) -> str:
+    """
+        Quote a lexical form as an N-Triples string.
+    """
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r') + '"'
+
+def ntriples_term(term) -> str:
+    """
+        Format an rdflib term (URIRef, BNode or Literal) in N-Triples syntax.
+    """
+    _load_rdflib()
+    if isinstance(term, Literal):
+        text = _nt_literal(str(term))
+        if term.language:
+            return f"{text}@{term.language}"
+        if term.datatype:
+            return f"{text}^^<{term.datatype}>"
+        return text
+    if isinstance(term, BNode):
+        return f"_:{term}"
+    return f"<{term}>"
+
+def ntriples_line(triple, graph_name=None) -> str:
+    """
+        Format a triple as one N-Triples line, or as an N-Quads line if graph_name is given.
+    """
+    s, p, o = triple
+    if graph_name is None:
+        return f"{ntriples_term(s)} {ntriples_term(p)} {ntriples_term(o)} .\n"
+    return f"{ntriples_term(s)} {ntriples_term(p)} {ntriples_term(o)} {ntriples_term(graph_name)} .\n"
+
+def ntriples_lines(graph, graph_name=None):
+    """
+        Generate the triples of a graph as N-Triples (or N-Quads) lines, without building the whole document.
+        The lines of an NTriplesWriter are passed through as they are.
+    """
+    if isinstance(graph, NTriplesWriter):
+        if graph_name is not None:
+            raise ValueError("An NTriplesWriter only holds N-Triples lines")
+        yield from graph.lines
+        return
+    for triple in graph:
+        yield ntriples_line(triple, graph_name)
+
+class NTriplesWriter:
+    """
+        Backend of OntologyBuilder that writes every new triple straight into a buffer
+        of escaped N-Triples lines instead of adding it to an rdflib Graph.
+
+        A Graph keeps each triple in three indexes; here a triple only costs its line
+        in the buffer. Lines written with add() also get an entry pointing at that same
+        string in the set used to drop repeated triples, lines written with write() do
+        not. The result can only be serialized as N-Triples.
+    """
+
+    def __init__(self, base=None):
+        """
+            Args:
+                base: Optional graph whose triples are written first, e.g. load_base_ontology()
+        """
+        self.lines = []
+        self.seen = set()
+        if base is not None:
+            for line in ntriples_lines(base):
+                self.write_line(line)
+
+    def add(self, triple) -> bool:
+        """
+            Write a triple, unless it was written before. Returns whether it was written.
+        """
+        return self.write_line(ntriples_line(triple))
+
+    def write(self, triple):
+        """
+            Write a triple known not to have been written before, without remembering it.
+        """
+        self.lines.append(ntriples_line(triple))
+
+    def write_line(self, line: str) -> bool:
+        if line in self.seen:
+            return False
+        self.seen.add(line)
+        self.lines.append(line)
+        return True
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def getvalue(self) -> str:
+        return "".join(self.lines)
+
+# rdflib serializer and file extension of each output format
+OUTPUT_FORMATS = {
+    "xml": ("application/rdf+xml", ".owl"),
+    "turtle": ("turtle", ".ttl"),
+    "nt": ("nt", ".nt"),
+    "json-ld": ("json-ld", ".jsonld"),
+}
+
+# Faster than the gzip default (9) for little size difference on RDF
+GZIP_LEVEL = 6
+
+def serialize_graph(graph, format: str = "xml", destination=None, compress: bool = False):
+    """
+        Serialize a graph in one of the OUTPUT_FORMATS, optionally gzip-compressed.
+
+        N-Triples are written line by line with ntriples_lines; with a destination
+        and compress, the compressed output is streamed to it without building the
+        whole document in memory first.
+
+        Args:
+            graph: Graph to serialize
+            format: "xml" (RDF/XML), "turtle", "nt" (N-Triples) or "json-ld"
+            destination: Optional path or binary file object to write to
+            compress: gzip the output
+
+        Returns:
+            str or bytes: The document, as gzip bytes when compress is set,
+                          or None when it was written to destination
+    """
+    if format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {format!r}, expected one of {', '.join(OUTPUT_FORMATS)}")
+    if isinstance(graph, NTriplesWriter) and format != "nt":
+        raise ValueError(f"An NTriplesWriter can only be serialized as N-Triples, not {format!r}")
+
+    if destination is None:
+        if not compress:
+            if format == "nt":
+                return "".join(ntriples_lines(graph))
+            return graph.serialize(format=OUTPUT_FORMATS[format][0], encoding="utf-8").decode("utf-8")
+        buffer = io.BytesIO()
+        _write_graph(graph, format, buffer, compress)
+        return buffer.getvalue()
+
+    if isinstance(destination, (str, os.PathLike)):
+        with open(destination, "wb") as f:
+            _write_graph(graph, format, f, compress)
+    else:
+        _write_graph(graph, format, destination, compress)
+    return None
+
+def _write_graph(graph, format: str, stream, compress: bool):
+    if compress:
+        with gzip.GzipFile(fileobj=stream, mode="wb", compresslevel=GZIP_LEVEL) as gz:
+            _write_graph(graph, format, gz, False)
+    elif format == "nt":
+        stream.writelines(line.encode("utf-8") for line in ntriples_lines(graph))
+    else:
+        graph.serialize(destination=stream, format=OUTPUT_FORMATS[format][0], encoding="utf-8")
 
 def find_parens(s):
     """
@@ -508,187 +1348,632 @@ def find_parens(s):
                 toret[pstack.pop()] = i
     return toret
 
-class DomainFunctions():
+_PAREN_RE = re.compile(r'[()]')
+
+class SExpr:
     """
-        Helper class containing functions to parse specific sections of PDDL domain files.
+        A parenthesized list of the S-expression tree built by parse_sexpr.
+
+        Lists only keep the offsets of their opening and closing parenthesis in
+        the source text, so the raw substring of any element can be sliced back
+        out without copying the text while parsing. Atoms are kept as strings.
     """
+    __slots__ = ("start", "end", "items")
 
-    def __init__(self):
-        pass
+    def __init__(self, start: int):
+        self.start = start
+        self.end = -1
+        self.items = []
 
-    def get_domain_name(self, text: str):
+    @property
+    def head(self) -> str:
         """
-            Extract the domain name from a PDDL domain file.
-            
-            Args:
-                text: PDDL domain file content
-                
-            Returns:
-                str: Domain name or "unknown_domain" if not found
+            Lowercased first atom of the list, or "" if the list does not start with an atom.
         """
-        for line in text.splitlines():
-            if '(domain' in line.lower():
-                ind = line.lower().index('(domain')
-                domain_line = line[ind:].strip()
-                match = re.search(r'\(domain\s+([^\s\)]+)', domain_line, flags=re.IGNORECASE)
-                if match:
-                    return match.group(1)
-        return "unknown_domain"
+        if self.items and isinstance(self.items[0], str):
+            return self.items[0].lower()
+        return ""
 
-    def get_requirements(self, text: str):
-        """
-            Extract PDDL requirements from domain file.
+    def atoms(self) -> list:
+        return [item for item in self.items if isinstance(item, str)]
 
-            Args:
-                text: PDDL domain file content
-                
-            Returns:
-                list: List of requirement strings
-        """
-        requirement_index = text.lower().index('(:requirements')
-        present_text = text[requirement_index:requirement_index + find_parens(text[requirement_index:])[0]]
-        # Split and return all requirements (skip the first element which is "(:requirements")
-        return present_text.split()[1:]
+    def lists(self) -> list:
+        return [item for item in self.items if isinstance(item, SExpr)]
 
-    def get_types(self, text: str):
+    def text(self, source: str) -> str:
         """
-            Extract type definitions from PDDL domain file.
-            
-            Args:
-                text: PDDL domain file content
-                
-            Returns:
-                dict or list: Type hierarchy (if typed) or simple type list
+            Raw substring of this list in the text it was parsed from.
         """
-        predicate_index = text.lower().index('(:types')
-        predicate_closing_ind = find_parens(text[predicate_index:])[0]
-
-        # Extract the content between (:types and closing parenthesis
-        file_data = text[predicate_index+8: predicate_index + predicate_closing_ind]
-        types_list = [item for item in file_data.split(' ') if item]
-
-        objects = '-' in types_list
-        types = {}
-        temp_list = []
-        flag = 1
-
-        for item in types_list:
-            if objects:
-                # Process typed hierarchy: subtype1 subtype2 - supertype
-                if item == '-':
-                    flag = 0
-                    continue
-                if flag:
-                    temp_list.append(item.replace('\n', ''))
-                else:
-                    flag = 1
-                    temp_item = item.replace('\n', '')
-                    if temp_item not in types:
-                        types[temp_item] = []
-                    types[temp_item].extend(temp_list)
-                    temp_list = []
-            else:
-                # Process simple type list
-                if flag:
-                    types = []
-                    flag = 0
-                types.append(item.replace('\n', ''))
-
-        return types
+        return source[self.start:self.end + 1]
 
-    def get_constants(self, text: str):
+    def keyword_value(self, keyword: str):
         """
-            Extract constant definitions from PDDL domain file.
-
-            Args:
-                text: PDDL domain file content
-                
-            Returns:
-                dict or list: Constants grouped by type (if typed) or simple constant list
+            Return the element following a keyword atom (e.g. ':parameters'), or None.
         """
-        predicate_index = text.lower().index('(:constants')
-        predicate_closing_ind = find_parens(text[predicate_index:])[0]
-
-        file_data = text[predicate_index+8: predicate_index + predicate_closing_ind]
-        constants_list = [item for item in file_data.split(' ') if item]
-
-        has_types = '-' in constants_list
-        constants = {}
-        temp_list = []
-        flag = 1
-
-        # Similar parsing logic to types
-        for item in constants_list:
-            if has_types:
-                if item == '-':
-                    flag = 0
-                    continue
-                if flag:
-                    temp_list.append(item.replace('\n', ''))
-                else:
-                    flag = 1
-                    temp_item = item.replace('\n', '')
-                    if temp_item not in constants:
-                        constants[temp_item] = []
-                    constants[temp_item].extend(temp_list)
-                    temp_list = []
-            else:
-                if flag:
-                    constants = []
-                    flag = 0
-                constants.append(item.replace('\n', ''))
+        items = self.items
+        for i, item in enumerate(items):
+            if isinstance(item, str) and item.lower() == keyword:
+                return items[i + 1] if i + 1 < len(items) else None
+        return None
 
-        return constants
+def parse_sexpr(text: str, start: int = 0, end: int = None) -> SExpr:
+    """
+        Tokenize a (comment-free) PDDL text in a single linear pass and build its S-expression tree.
 
-    def get_predicates(self, text: str):
-        """
-            Extract predicate definitions from PDDL domain file.
+        Only parentheses are visited one by one; the atoms between two consecutive
+        parentheses are split off in bulk.
 
-            Handles:
-            - Multiple predicates
-            - Single predicate
-            - Empty predicates section
+        Args:
+            text: PDDL text with comments already removed
+            start, end: Only tokenize text[start:end]; offsets in the tree stay relative to text
+
+        Returns:
+            SExpr: Virtual root list whose items are the top-level elements of the text.
+                   Unbalanced closing parentheses are ignored and unclosed lists end at
+                   the end of the text.
+    """
+    if end is None:
+        end = len(text)
+    root = SExpr(start - 1)
+    stack = [root]
+    top = root.items
+    pos = start
+    for match in _PAREN_RE.finditer(text, start, end):
+        i = match.start()
+        if i > pos:
+            top.extend(text[pos:i].split())
+        pos = i + 1
+
+        if text[i] == '(':
+            node = SExpr(i)
+            top.append(node)
+            stack.append(node)
+            top = node.items
+        elif len(stack) > 1:  # Safety check for unbalanced parens
+            stack.pop().end = i
+            top = stack[-1].items
+
+    top.extend(text[pos:end].split())
+    while len(stack) > 1:
+        stack.pop().end = end - 1
+    root.end = end
+    return root
+
+def _close_paren(text: str, start: int) -> int:
+    """
+        Return the offset of the parenthesis closing the one at start, or the last offset of text if it is unclosed.
+    """
+    depth = 0
+    for match in _PAREN_RE.finditer(text, start):
+        if match.group() == '(':
+            depth += 1
+        else:
+            depth -= 1
+            if not depth:
+                return match.start()
+    return len(text) - 1
+
+# "(define", the list holding the sections of a domain or problem
+_DEFINE_RE = re.compile(r'\(\s*define(?=[\s()]|$)', re.IGNORECASE)
+
+# First atom of a list, read right after its opening parenthesis
+_HEAD_RE = re.compile(r'\s*([^\s()]+)')
+
+class SectionIndex:
+    """
+        Offsets of the top-level lists (sections) of a PDDL text, found on demand.
+
+        The text is walked one section at a time and only as far as a lookup needs:
+        for each section, only its parentheses are visited to find where it ends, and
+        its atoms are not split. A section is tokenized into an SExpr the first time
+        it is asked for, so reading the domain name or the objects of a problem does
+        not tokenize its :init.
+    """
+    __slots__ = ("text", "spans", "_pos", "_in_define", "_done", "_nodes")
+
+    def __init__(self, text: str):
+        self.text = text
+        # (head, start, end) of the sections indexed so far, in text order
+        self.spans = []
+        match = _DEFINE_RE.search(text)
+        # Sections are the lists inside (define ...), or the top-level lists of PDDL fragments
+        self._in_define = match is not None
+        self._pos = match.end() if match else 0
+        self._done = False
+        self._nodes = {}
+
+    def _scan(self) -> bool:
+        """
+            Index the next section. Returns False once all sections are indexed.
+        """
+        text = self.text
+        while not self._done:
+            match = _PAREN_RE.search(text, self._pos)
+            if match is None or (match.group() == ')' and self._in_define):
+                self._done = True
+                break
+            start = match.start()
+            if match.group() == ')':  # Unbalanced closing parenthesis of a fragment
+                self._pos = start + 1
+                continue
+            end = _close_paren(text, start)
+            head = _HEAD_RE.match(text, start + 1)
+            self.spans.append((head.group(1).lower() if head else "", start, end))
+            self._pos = end + 1
+            return True
+        return False
+
+    def __iter__(self):
+        i = 0
+        while i < len(self.spans) or self._scan():
+            yield self.spans[i]
+            i += 1
+
+    def node(self, start: int, end: int) -> SExpr:
+        """
+            Return the tokenized section spanning text[start:end + 1].
+        """
+        node = self._nodes.get(start)
+        if node is None:
+            node = self._nodes[start] = parse_sexpr(self.text, start, end + 1).items[0]
+        return node
+
+    def section(self, name: str):
+        """
+            Return the first section whose head is name, or None.
+        """
+        for head, start, end in self:
+            if head == name:
+                return self.node(start, end)
+        return None
+
+    def sections(self, name: str) -> list:
+        """
+            Return all sections whose head is name.
+        """
+        return [self.node(start, end) for head, start, end in self if head == name]
+
+def _typed_list(tokens: list):
+    """
+        Parse a PDDL typed list ("a b - type1 c - type2") as found in :types, :constants and :objects.
+
+        Returns:
+            dict or list: Names grouped by type (if typed) or simple name list
+    """
+    if '-' not in tokens:
+        return list(tokens)
+
+    grouped = {}
+    pending = []
+    expect_type = False
+    for token in tokens:
+        if token == '-':
+            expect_type = True
+        elif expect_type:
+            grouped.setdefault(token, []).extend(pending)
+            pending = []
+            expect_type = False
+        else:
+            pending.append(token)
+    return grouped
+
+def _conjunct_nodes(node) -> list:
+    """
+        Split a condition or effect expression into its top-level conjuncts.
+        A single expression without (and ...) wrapper is returned as is.
+    """
+    if not isinstance(node, SExpr):
+        return []
+    sub_lists = node.lists()
+    if node.head == 'and' and sub_lists:
+        return sub_lists
+    return [node]
+
+def _conjuncts(node, source: str) -> list:
+    return [sub.text(source) for sub in _conjunct_nodes(node)]
+
+def _section_fact_nodes(node) -> list:
+    """
+        List the facts of an (:init ...) or (:goal ...) section, unwrapping a leading (and ...).
+    """
+    if node is None:
+        return []
+    sub_lists = node.lists()
+    if sub_lists and sub_lists[0].head == 'and':
+        sub_lists = sub_lists[0].lists() + sub_lists[1:]
+    return sub_lists
+
+def _section_facts(node, source: str) -> list:
+    return [sub.text(source) for sub in _section_fact_nodes(node)]
+
+class SymbolTable:
+    """
+        Interned names (predicates, objects, variables, keywords) of a parsed domain and its problems.
+        Every distinct name is stored once and referred to by its id, in order of first appearance.
+    """
+    __slots__ = ("names", "ids")
+
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+
+    def intern(self, name: str) -> int:
+        symbol = self.ids.get(name)
+        if symbol is None:
+            symbol = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return symbol
+
+    def __getitem__(self, symbol: int) -> str:
+        return self.names[symbol]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+# Markers of nested lists in the symbol ids of an AtomTable record
+IR_OPEN = -1
+IR_CLOSE = -2
+
+class AtomTable:
+    """
+        Array-backed list of PDDL expressions (predicates, conditions, facts, plan steps).
+
+        All records share one flat array of symbol ids, with IR_OPEN / IR_CLOSE around
+        nested lists, and an array of offsets; the outer parentheses are implicit, so
+        "(at truck1 depot3)" takes three ids. Iterating yields the expressions as text,
+        with single spaces between tokens, so the table can stand in for a list of strings.
+    """
+    __slots__ = ("symbols", "data", "offsets")
+
+    def __init__(self, symbols: SymbolTable):
+        self.symbols = symbols
+        self.data = array('i')
+        self.offsets = array('q', [0])
+
+    def append(self, node: SExpr):
+        """
+            Add a parsed expression.
+        """
+        self._encode(node.items)
+        self.offsets.append(len(self.data))
+
+    def append_tokens(self, tokens):
+        """
+            Add a flat expression from its tokens (e.g. a plan step "(move a b)" as ["move", "a", "b"]).
+        """
+        intern = self.symbols.intern
+        self.data.extend(intern(token) for token in tokens)
+        self.offsets.append(len(self.data))
+
+    def _encode(self, items):
+        intern = self.symbols.intern
+        data = self.data
+        for item in items:
+            if isinstance(item, str):
+                data.append(intern(item))
+            else:
+                data.append(IR_OPEN)
+                self._encode(item.items)
+                data.append(IR_CLOSE)
+
+    def ids(self, index: int) -> tuple:
+        """
+            Symbol ids of a record; for a flat atom the first one is its predicate.
+        """
+        return tuple(self.data[self.offsets[index]:self.offsets[index + 1]])
+
+    def text(self, index: int) -> str:
+        return self._render(self.data[self.offsets[index]:self.offsets[index + 1]])
+
+    def atom(self, index: int):
+        """
+            Parts of a record read from its symbol ids, as OntologyBuilder.atom_parts reads them from text.
+
+            Returns:
+                tuple: (negated, tokens) for "(p a b)" or "(not (p a b))", None for other expressions
+        """
+        ids = self.data[self.offsets[index]:self.offsets[index + 1]]
+        names = self.symbols.names
+        if IR_OPEN not in ids:
+            return False, [names[symbol] for symbol in ids]
+        inner = ids[2:-1]
+        if (len(ids) >= 3 and ids[1] == IR_OPEN and ids[-1] == IR_CLOSE and names[ids[0]].lower() == 'not'
+                and IR_OPEN not in inner and IR_CLOSE not in inner):
+            return True, [names[symbol] for symbol in inner]
+        return None
+
+    def _render(self, ids) -> str:
+        names = self.symbols.names
+        if IR_OPEN not in ids:
+            # Flat atom, the common case
+            return "(" + " ".join([names[symbol] for symbol in ids]) + ")"
+        out = ["("]
+        space = False
+        for symbol in ids:
+            if symbol == IR_CLOSE:
+                out.append(")")
+                space = True
+                continue
+            if space:
+                out.append(" ")
+            if symbol == IR_OPEN:
+                out.append("(")
+                space = False
+            else:
+                out.append(names[symbol])
+                space = True
+        out.append(")")
+        return "".join(out)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        data, offsets, render = self.data, self.offsets, self._render
+        for index in range(len(offsets) - 1):
+            yield render(data[offsets[index]:offsets[index + 1]])
+
+    def nbytes(self) -> int:
+        return self.data.itemsize * len(self.data) + self.offsets.itemsize * len(self.offsets)
+
+class ActionIR:
+    """
+        Action schema of a DomainIR.
+    """
+    __slots__ = ("name", "parameters", "preconditions", "effects")
+
+    def __init__(self, name: str, parameters: dict, preconditions: AtomTable, effects: AtomTable):
+        self.name = name
+        self.parameters = parameters  # {"values": [...], "types": [...]} as in get_actions
+        self.preconditions = preconditions
+        self.effects = effects
+
+class ProblemIR:
+    """
+        Problem (and plan) of a DomainIR.
+    """
+    __slots__ = ("name", "objects", "init", "goal", "plan", "plan_times", "plan_cost")
+
+    def __init__(self, name: str, objects, init: AtomTable, goal: AtomTable, plan: AtomTable,
+                 plan_times: list = None, plan_cost: float = None):
+        self.name = name
+        self.objects = objects
+        self.init = init
+        self.goal = goal
+        self.plan = plan
+        self.plan_times = plan_times
+        self.plan_cost = plan_cost
+
+    def sections(self) -> dict:
+        """
+            View of the problem in the format of PDDLParser.run, without copying the atom tables.
+        """
+        sections = {"objects": self.objects, "init": self.init, "goal": self.goal}
+        if len(self.plan):
+            sections["plan"] = self.plan
+            if self.plan_times is not None:
+                sections["plan_times"] = self.plan_times
+            if self.plan_cost is not None:
+                sections["plan_cost"] = self.plan_cost
+        return sections
+
+class DomainIR:
+    """
+        Compact form of a parsed domain and its problems, returned by PDDLParser.run_ir.
+
+        Expressions are kept in AtomTables over one SymbolTable shared by the domain and
+        its problems, instead of one string per predicate, condition, fact and plan step.
+    """
+    __slots__ = ("name", "symbols", "requirements", "types", "constants", "predicates", "actions", "problems")
+
+    def __init__(self, name: str, symbols: SymbolTable):
+        self.name = name
+        self.symbols = symbols
+        self.requirements = []
+        self.types = {}
+        self.constants = {}
+        self.predicates = AtomTable(symbols)
+        self.actions = []
+        self.problems = []
+
+    def sections(self) -> dict:
+        """
+            View of the domain in the format of PDDLParser.run, without copying the atom tables.
+        """
+        sections = {
+            "requirements": self.requirements,
+            "types": self.types,
+            "constants": self.constants,
+            "predicates": self.predicates,
+            "actions": {
+                action.name: {
+                    "parameters": action.parameters,
+                    "preconditions": action.preconditions,
+                    "effect": action.effects,
+                }
+                for action in self.actions
+            },
+        }
+        if self.problems:
+            sections["Problems"] = {problem.name: problem.sections() for problem in self.problems}
+        return sections
+
+# A step is a flat parenthesized group, optionally with a "0.000:" start time and a "[1.000]" duration.
+# Lone parentheses are matched separately to track the nesting of other groups.
+_PLAN_TOKEN_RE = re.compile(r'(?:(\d+(?:\.\d*)?)\s*:\s*)?\(([^()]*)\)(?:\s*\[\s*(\d+(?:\.\d*)?)\s*\])?|[()]')
+# Valid actions look like (name arg1 arg2): alphanumeric, hyphens, underscores, question marks, dots
+_PLAN_ACTION_RE = re.compile(r'\s*[a-zA-Z][\w\-\?\.]*(?:\s+[\w\?\-\.]+)*\s*')
+# Some solvers output (output), (plan), (found plan)
+_PLAN_NOISE = {'output', 'plan', 'foundplan'}
+_PLAN_COST_RE = re.compile(r';\s*cost\s*=\s*(\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)', re.IGNORECASE)
+
+def iter_plan_steps(text: str):
+    """
+        Read the steps of a plan in a single linear pass.
+
+        Steps are the top-level parenthesized groups that look like actions, one per
+        line or concatenated (DOM text). Nested groups such as PDDL definitions pasted
+        after the plan and comments are skipped.
+
+        Args:
+            text: Raw plan file content
+
+        Yields:
+            tuple: (action, start_time, duration), where the times are floats for
+                   temporal plans ("0.000: (a b) [1.000]") and None otherwise
+    """
+    text = re.sub(r";.*$", "", text, flags=re.MULTILINE)
+    depth = 0
+    for match in _PLAN_TOKEN_RE.finditer(text):
+        content = match.group(2)
+        if content is None:
+            depth = depth + 1 if match.group() == '(' else max(depth - 1, 0)
+            continue
+        if depth or not _PLAN_ACTION_RE.fullmatch(content):
+            continue
+        words = content.split()
+        if len(words) <= 2 and "".join(words).lower() in _PLAN_NOISE:
+            continue
+        start, duration = match.group(1), match.group(3)
+        yield (text[match.start(2) - 1:match.end(2) + 1],
+               float(start) if start else None,
+               float(duration) if duration else None)
+
+def plan_cost(text: str):
+    """
+        Return the cost stated in a "; cost = 12 (unit cost)" plan footer as a float, or None.
+    """
+    match = _PLAN_COST_RE.search(text)
+    return float(match.group(1)) if match else None
+
+class SExprReader():
+    """
+        Base class for the section getters. The SectionIndex of a text is kept, so
+        that consecutive getters called on the same text share its offsets and its
+        tokenized sections, and each section is tokenized only when first needed.
+    """
+
+    def __init__(self):
+        self._text = None
+        self._index = None
+        self._tree_text = None
+        self._tree = None
+
+    def index(self, text: str) -> SectionIndex:
+        """
+            Return the SectionIndex of text, creating it only if text differs from the last text seen.
+        """
+        if text is not self._text and text != self._text:
+            self._index = SectionIndex(text)
+            self._text = text
+        return self._index
+
+    def tree(self, text: str) -> SExpr:
+        """
+            Return the S-expression tree of the whole text, parsing it only if it differs from the last text seen.
+        """
+        if text is not self._tree_text and text != self._tree_text:
+            self._tree = parse_sexpr(text)
+            self._tree_text = text
+        return self._tree
+
+    def sections(self, text: str, name: str) -> list:
+        """
+            Return all top-level lists of text whose head is name (e.g. ':action').
+        """
+        return self.index(text).sections(name)
+
+    def section(self, text: str, name: str):
+        """
+            Return the first top-level list of text whose head is name, or None.
+        """
+        return self.index(text).section(name)
+
+class DomainFunctions(SExprReader):
+    """
+        Helper class containing functions to parse specific sections of PDDL domain files.
+    """
+
+    def get_domain_name(self, text: str):
+        """
+            Extract the domain name from a PDDL domain file.
 
             Args:
                 text: PDDL domain file content
 
             Returns:
-                list: List of predicate definitions as strings
+                str: Domain name or "unknown_domain" if not found
         """
-        try:
-            predicate_index = text.lower().index('(:predicates')
-        except ValueError:
-            return []
+        node = self.section(text, 'domain')
+        if node is not None and len(node.items) > 1 and isinstance(node.items[1], str):
+            return node.items[1]
+        return "unknown_domain"
+
+    def get_requirements(self, text: str):
+        """
+            Extract PDDL requirements from domain file.
 
-        pred_section = text[predicate_index:]
-        paren_dict = find_parens(pred_section)
+            Args:
+                text: PDDL domain file content
 
-        if not paren_dict or 0 not in paren_dict:
+            Returns:
+                list: List of requirement strings
+        """
+        node = self.section(text, ':requirements')
+        if node is None:
             return []
+        # Skip the first atom which is ":requirements"
+        return node.atoms()[1:]
 
-        predicate_closing_ind = paren_dict[0]
-
-        # Extract the entire predicates section
-        file_data = text[predicate_index:predicate_index + predicate_closing_ind + 1]
-        predicates_list = []
-
-        # Find each predicate by iterating through and finding opening parens
-        ind = 1  # Start after the opening paren of (:predicates
-        while ind < len(file_data):
-            if file_data[ind] == "(":
-                inner_dict = find_parens(file_data[ind:])
-                if inner_dict and 0 in inner_dict:
-                    closing_ind = inner_dict[0]
-                    present_text = file_data[ind:ind + closing_ind + 1]
-                    predicates_list.append(present_text)
-                    # Skip past this predicate to avoid finding nested parens
-                    ind = ind + closing_ind + 1
-                else:
-                    ind += 1
-            else:
-                ind += 1
+    def get_types(self, text: str):
+        """
+            Extract type definitions from PDDL domain file.
+
+            Args:
+                text: PDDL domain file content
+
+            Returns:
+                dict or list: Type hierarchy (if typed) or simple type list
+        """
+        node = self.section(text, ':types')
+        if node is None:
+            return {}
+        return _typed_list(node.atoms()[1:])
+
+    def get_constants(self, text: str):
+        """
+            Extract constant definitions from PDDL domain file.
+
+            Args:
+                text: PDDL domain file content
+
+            Returns:
+                dict or list: Constants grouped by type (if typed) or simple constant list
+        """
+        node = self.section(text, ':constants')
+        if node is None:
+            return {}
+        return _typed_list(node.atoms()[1:])
+
+    def get_predicates(self, text: str):
+        """
+            Extract predicate definitions from PDDL domain file.
+
+            Handles:
+            - Multiple predicates
+            - Single predicate
+            - Empty predicates section
+
+            Args:
+                text: PDDL domain file content
 
-        return predicates_list
+            Returns:
+                list: List of predicate definitions as strings
+        """
+        node = self.section(text, ':predicates')
+        if node is None:
+            return []
+        return [predicate.text(text) for predicate in node.lists()]
 
     def get_params(self, data: str):
         """
@@ -706,59 +1991,7 @@ class DomainFunctions():
             Returns:
                 dict: Parameter information with values and types
         """
-        try:
-            params_index = data.lower().index(':parameters')
-        except ValueError:
-            return {"parameters": {"values": [], "types": []}}
-
-        params_text = data[params_index:]
-        index_dict = find_parens(params_text)
-
-        # No parentheses found - malformed, return empty
-        if not index_dict:
-            return {"parameters": {"values": [], "types": []}}
-
-        sorted_keys = sorted(list(index_dict.keys()))
-
-        # Get the first parenthesis pair for parameters
-        start_ind = sorted_keys[0]
-        closing_ind = index_dict[start_ind]
-
-        # Extract content between parentheses
-        params_content = params_text[start_ind + 1:closing_ind]
-
-        # Empty parameters: :parameters ()
-        if not params_content.strip():
-            return {"parameters": {"values": [], "types": []}}
-
-        # Split by whitespace, replacing hyphens with space for type separation
-        data_string = re.split(r"\s+", params_content.replace('-', ' ').strip())
-        data_string = [s for s in data_string if s]  # Remove empty strings
-
-        values = []  # Parameter names
-        types = []   # Parameter types
-        pending_params = []  # Params waiting for a type
-
-        for token in data_string:
-            if token.startswith('?'):
-                # This is a parameter variable
-                values.append(token)
-                pending_params.append(token)
-            else:
-                # This is a type - assign to all pending parameters
-                for _ in pending_params:
-                    types.append(token)
-                pending_params = []
-
-        # Handle untyped parameters at the end (no type assigned)
-        # Leave types list shorter - the ontology builder handles this
-
-        return {
-            "parameters": {
-                "values": values,
-                "types": types
-            }
-        }
+        return {"parameters": self._action_params(self._action_node(data))}
 
     def get_preconditions(self, data: str):
         """
@@ -775,51 +2008,7 @@ class DomainFunctions():
             Returns:
                 list: List of precondition expressions
         """
-        try:
-            index = data.lower().index(':precondition')
-        except ValueError:
-            return []
-
-        precond_text = data[index:]
-        index_dict = find_parens(precond_text)
-
-        # No parentheses found after :precondition
-        if not index_dict:
-            return []
-
-        sorted_keys = sorted(list(index_dict.keys()))
-
-        # Only the outer precondition parenthesis exists - single precondition case
-        if len(sorted_keys) == 1:
-            outer_start = sorted_keys[0]
-            outer_end = index_dict[outer_start]
-            single_precond = precond_text[outer_start:outer_end + 1]
-            return [single_precond]
-
-        # Multiple parenthesis pairs - check for (and ...) wrapper
-        outer_start = sorted_keys[0]
-        outer_content = precond_text[outer_start:outer_start + 5].lower()
-
-        if outer_content.startswith("(and"):
-            # Skip outer (and ...) wrapper, use inner elements
-            ind_list = sorted_keys[1:]
-        else:
-            # No (and ...) wrapper - could be nested predicates like (not (pred))
-            ind_list = sorted_keys
-
-        # Handle edge case: empty list after processing
-        if not ind_list:
-            return []
-
-        # Extract individual precondition expressions
-        preconditions = []
-        previous_end = -1
-        for idx in ind_list:
-            if idx > previous_end:
-                preconditions.append(precond_text[idx:index_dict[idx] + 1])
-                previous_end = index_dict[idx]
-
-        return preconditions
+        return _conjuncts(self._action_node(data).keyword_value(':precondition'), data)
 
     def get_effect(self, data: str):
         """
@@ -836,54 +2025,12 @@ class DomainFunctions():
             Returns:
                 list: List of effect expressions
         """
-        try:
-            index = data.lower().index(':effect')
-        except ValueError:
-            return []
-
-        effect_text = data[index:]
-        index_dict = find_parens(effect_text)
-
-        # No parentheses found after :effect
-        if not index_dict:
-            return []
-
-        sorted_keys = sorted(list(index_dict.keys()))
-
-        # Only the outer effect parenthesis exists - single effect case
-        if len(sorted_keys) == 1:
-            outer_start = sorted_keys[0]
-            outer_end = index_dict[outer_start]
-            single_effect = effect_text[outer_start:outer_end + 1]
-            return [single_effect]
-
-        # Multiple parenthesis pairs - check for (and ...) wrapper
-        ind_list = sorted_keys[1:]  # Skip outer parens
-
-        # Check if first inner element is '(and ...)'
-        if ind_list:
-            first_content = effect_text[ind_list[0]:ind_list[0] + 5].lower()
-            if first_content.startswith("(and"):
-                ind_list = ind_list[1:]  # Skip the 'and' wrapper
-
-        # Handle edge case: after removing (and), list might be empty
-        if not ind_list:
-            return []
-
-        # Extract individual effect expressions
-        effects = []
-        previous_end = -1
-        for idx in ind_list:
-            if idx > previous_end:
-                effects.append(effect_text[idx:index_dict[idx] + 1])
-                previous_end = index_dict[idx]
-
-        return effects
+        return _conjuncts(self._action_node(data).keyword_value(':effect'), data)
 
     def get_actions(self, text: str):
         """
             Extract actions from domain text.
-            
+
             Args:
                 text: Domain text
 
@@ -891,35 +2038,66 @@ class DomainFunctions():
                 dict: Mapping action_name -> {parameters, preconditions, effect}
         """
         return_dict = {}
-        # Case insensitive regex for actions
-        list_of_action_index = [m.start() for m in re.finditer(r'\(:action', text, re.IGNORECASE)]
 
-        for action_index in list_of_action_index:
-            action_closing_ind = find_parens(text[action_index:])[0]
-            temp_data = text[action_index: action_index + action_closing_ind + 1]
-
-            # Action name is the last token of the header line
-            action_name = str(temp_data.split('\n')[0]).split(' ')[-1]
-            parameters = self.get_params(temp_data)
-            preconditions = self.get_preconditions(temp_data)
-            effect = self.get_effect(temp_data)
+        for node in self.sections(text, ':action'):
+            # Action name is the atom following ":action"
+            action_name = node.items[1] if len(node.items) > 1 and isinstance(node.items[1], str) else ""
 
             return_dict[action_name] = {
-                "parameters": parameters["parameters"],
-                "preconditions": preconditions,
-                "effect": effect
+                "parameters": self._action_params(node),
+                "preconditions": _conjuncts(node.keyword_value(':precondition'), text),
+                "effect": _conjuncts(node.keyword_value(':effect'), text)
             }
 
         return return_dict
 
-class ProblemFunctions():
+    def _action_node(self, data: str) -> SExpr:
+        """
+            Return the (:action ...) list of a standalone action definition string.
+        """
+        root = self.tree(data)
+        for node in root.items:
+            if isinstance(node, SExpr):
+                return node
+        return root
+
+    def _action_params(self, node: SExpr) -> dict:
+        """
+            Read the :parameters list of an action into parameter names and types.
+        """
+        params = node.keyword_value(':parameters')
+        if not isinstance(params, SExpr):
+            return {"values": [], "types": []}
+
+        values = []  # Parameter names
+        types = []   # Parameter types
+        pending_params = []  # Params waiting for a type
+
+        for token in params.items:
+            if isinstance(token, SExpr):
+                # (either t1 t2 ...) - every member is a type of the pending parameters
+                members = token.atoms()[1:] if token.head == 'either' else []
+                types.extend(list(members) for _ in pending_params)
+                pending_params = []
+            elif token.startswith('?'):
+                # This is a parameter variable
+                values.append(token)
+                pending_params.append(token)
+            elif token != '-':
+                # This is a type - assign to all pending parameters
+                types.extend(token for _ in pending_params)
+                pending_params = []
+
+        # Untyped parameters at the end are left without type, so the
+        # types list may be shorter - the ontology builder handles this.
+        # Parameters of an (either ...) type get the list of its members
+        return {"values": values, "types": types}
+
+class ProblemFunctions(SExprReader):
     """
         Helper class containing functions to parse specific sections of PDDL Problem files.
     """
 
-    def __init__(self):
-        pass
-
     def get_problem_name(self, text: str):
         """
             Extract the problem name and associated domain from a PDDL problem file.
@@ -928,16 +2106,18 @@ class ProblemFunctions():
                 text: PDDL problem file content
 
             Returns:
-                tuple: (problem_name, domain_name) or ("unknown_problem", "unknown_domain") if not found
+                tuple: (problem_name, domain_name), with "unknown_problem" / "unknown_domain" for missing parts
         """
-        # Normalize whitespace to simplify regex matching
-        content = re.sub(r'\s+', ' ', text)
-        match = re.search(r'\(define\s*\(problem\s+([^\s\)]+)\)\s*\(:domain\s+([^\s\)]+)\)', content, flags=re.IGNORECASE)
-        if match:
-            problem_name = match.group(1).strip()
-            domain_name = match.group(2).strip()
-            return problem_name, domain_name
-        return "unknown_problem", "unknown_domain"
+        problem_name, domain_name = "unknown_problem", "unknown_domain"
+
+        node = self.section(text, 'problem')
+        if node is not None and len(node.items) > 1 and isinstance(node.items[1], str):
+            problem_name = node.items[1]
+        node = self.section(text, ':domain')
+        if node is not None and len(node.items) > 1 and isinstance(node.items[1], str):
+            domain_name = node.items[1]
+
+        return problem_name, domain_name
 
     def get_objects(self, text: str):
         """
@@ -949,45 +2129,10 @@ class ProblemFunctions():
             Returns:
                 dict or list: Objects grouped by type (if typed) or simple object list
         """
-        start_index = text.lower().index('(:objects')
-        closing_ind = find_parens(text[start_index:])[0]
-        objects_text = text[start_index+10: start_index + closing_ind]
-        instances_list = [item for item in objects_text.split(' ') if item]
-
-        # Detect whether typed objects are present (marked with '-')
-        if '-' in instances_list:
-            objects = True
-        else:
-            objects = False
-
-        instances = {}
-        temp_list = []
-        flag = 1
-
-        # Parse objects, handling typed and untyped cases
-        for item in instances_list:
-            item = item.strip()
-            if objects:
-                if item == '-':
-                    flag = 0
-                    continue
-                if flag:
-                    temp_list.append(item.replace('\n', ''))
-                else:
-                    flag = 1
-                    temp_item = item.replace('\n', '')
-                    if temp_item not in instances:
-                        instances[temp_item] = []
-                    instances[temp_item].extend(temp_list)
-                    temp_list = []
-                    flag = 1
-            else:
-                if flag:
-                    instances = []
-                    flag = 0
-                instances.append(item.replace('\n', ''))
-
-        return instances
+        node = self.section(text, ':objects')
+        if node is None:
+            return []
+        return _typed_list(node.atoms()[1:])
 
     def get_initial_state(self, text: str):
         """
@@ -1005,54 +2150,7 @@ class ProblemFunctions():
             Returns:
                 list: List of initial state expressions
         """
-        try:
-            start_index = text.lower().index('(:init')
-        except ValueError:
-            return []
-
-        init_section = text[start_index:]
-        paren_dict = find_parens(init_section)
-
-        if not paren_dict or 0 not in paren_dict:
-            return []
-
-        closing_idx = paren_dict[0]
-        block_text = text[start_index:start_index + closing_idx + 1]
-
-        # Find all nested parentheses inside init block
-        index_dict = find_parens(block_text)
-
-        if not index_dict:
-            return []
-
-        sorted_keys = sorted(list(index_dict.keys()))
-
-        # Only the outer (:init ...) parenthesis - empty init
-        if len(sorted_keys) == 1:
-            return []
-
-        # Skip the outer (:init ...) parenthesis
-        ind_list = sorted_keys[1:]
-
-        # Check if there's an (and ...) wrapper (unusual for :init but handle it)
-        if ind_list:
-            first_content = block_text[ind_list[0]:ind_list[0] + 5].lower()
-            if first_content.startswith("(and"):
-                ind_list = ind_list[1:]
-
-        # Handle edge case: empty after removing (and)
-        if not ind_list:
-            return []
-
-        # Extract individual state facts
-        states = []
-        previous_end = -1
-        for idx in ind_list:
-            if idx > previous_end:
-                states.append(block_text[idx:index_dict[idx] + 1])
-                previous_end = index_dict[idx]
-
-        return states
+        return _section_facts(self.section(text, ':init'), text)
 
     def get_goal_state(self, text: str):
         """
@@ -1069,83 +2167,1675 @@ class ProblemFunctions():
             Returns:
                 list: List of goal state expressions
         """
-        try:
-            start_index = text.lower().index('(:goal')
-        except ValueError:
-            return []
+        return _section_facts(self.section(text, ':goal'), text)
 
-        goal_section = text[start_index:]
-        paren_dict = find_parens(goal_section)
+# Sections (and plans) shorter than this are parsed in the calling process by PDDLParser.run_parallel
+PARALLEL_MIN_CHARS = 1 << 18
 
-        if not paren_dict or 0 not in paren_dict:
-            return []
+# Start of a list: the places where _split_units may cut
+_LIST_START_RE = re.compile(r'\(')
 
-        closing_idx = paren_dict[0]
-        block_text = text[start_index:start_index + closing_idx + 1]
+def _split_units(text: str, start: int, end: int, pattern, parts: int) -> list:
+    """
+        Split text[start:end] into about `parts` ranges of whole top-level lists.
 
-        # Find all nested parentheses inside goal block
-        index_dict = find_parens(block_text)
+        Cuts are only made before a match of pattern at the top level of the range. The
+        nesting depth at a candidate cut is read off the parenthesis counts since the
+        previous one, which str.count does without visiting the characters one by one;
+        this assumes the parentheses of the range are balanced.
 
-        if not index_dict:
-            return []
+        Returns:
+            list: (start, end) offsets of the ranges, in text order
+    """
+    cuts = [start]
+    depth = 0
+    pos = start
+    for i in range(1, parts):
+        target = max(start + (end - start) * i // parts, pos + 1)
+        for match in pattern.finditer(text, target, end):
+            cut = match.start()
+            depth += text.count('(', pos, cut) - text.count(')', pos, cut)
+            pos = cut
+            if depth == 0:
+                cuts.append(cut)
+                break
+        else:
+            break
+    cuts.append(end)
+    return list(zip(cuts, cuts[1:]))
+
+def _section_content(index: SectionIndex, name: str):
+    """
+        Find the content of a section (e.g. ':init') from the section offsets of index, without tokenizing it.
 
-        sorted_keys = sorted(list(index_dict.keys()))
+        The section is the one run reads, so lists before or after the (define ...) are
+        not taken for part of it.
 
-        # Only the outer (:goal ...) parenthesis - empty goal
-        if len(sorted_keys) == 1:
-            return []
+        Returns:
+            tuple: (start, end) of the lists inside the section, inside its leading
+                   (and ...) if there is one; None if the section is missing, unclosed,
+                   or has lists after its (and ...)
+    """
+    text = index.text
+    for head, start, end in index:
+        if head == name:
+            break
+    else:
+        return None
+    if text[end] != ')':
+        return None
+    start = _HEAD_RE.match(text, start + 1).end()
+
+    first = _LIST_START_RE.search(text, start, end)
+    head = _HEAD_RE.match(text, first.start() + 1) if first else None
+    if head and head.group(1).lower() == 'and':
+        # Facts of a leading (and ...) are unwrapped, as in _section_fact_nodes
+        close = _close_paren(text, first.start())
+        if close >= end or '(' in text[close + 1:end]:
+            return None
+        return head.end(), close
+    return start, end
+
+def _list_texts(text: str) -> list:
+    """
+        Worker side of _submit_facts: the texts of the top-level lists of a range.
+    """
+    return [node.text(text) for node in parse_sexpr(text).lists()]
+
+def _chunk_actions(text: str) -> dict:
+    """
+        Worker side of _submit_actions: the actions of a range of (:action ...) blocks.
+    """
+    return DomainFunctions().get_actions(text)
+
+def _plan_step_list(text: str) -> list:
+    return list(iter_plan_steps(text))
+
+def _submit_facts(index: SectionIndex, name: str, executor, parts: int):
+    """
+        Split the :init or :goal atoms of a problem into ranges parsed on executor.
+
+        Returns:
+            iterator: Fact lists of the ranges, in order, or None when the section is
+                      small or cannot be split (it is then parsed by ProblemFunctions)
+    """
+    content = _section_content(index, name)
+    if content is None or content[1] - content[0] < PARALLEL_MIN_CHARS:
+        return None
+    text = index.text
+    ranges = _split_units(text, content[0], content[1], _LIST_START_RE, parts)
+    return executor.map(_list_texts, [text[start:end] for start, end in ranges])
+
+def _submit_actions(index: SectionIndex, executor, parts: int):
+    """
+        Split the (:action ...) sections of a domain into groups parsed on executor.
+
+        Returns:
+            iterator: Action dicts of the groups, in order, or None when the actions are
+                      few or unclosed (they are then parsed by DomainFunctions)
+    """
+    text = index.text
+    spans = [(start, end) for head, start, end in index if head == ':action']
+    if not spans or spans[-1][1] + 1 - spans[0][0] < PARALLEL_MIN_CHARS or text[spans[-1][1]] != ')':
+        return None
+    size = (spans[-1][1] + 1 - spans[0][0]) // parts + 1
+    groups = []
+    for start, end in spans:
+        if groups and start - groups[-1][0] < size:
+            groups[-1][1] = end
+        else:
+            groups.append([start, end])
+    # Other sections between the actions of a group are skipped by get_actions
+    return executor.map(_chunk_actions, [text[start:end + 1] for start, end in groups])
+
+# Opcodes of the condition trees compiled by PlanValidator
+_ATOM, _NOT, _AND, _OR, _IMPLY, _EQ, _FORALL, _EXISTS, _UNSUPPORTED = range(9)
+
+# Effects of compiled actions
+_ADD, _DEL, _WHEN, _FORALL_EFFECT = range(4)
+
+# Numeric effects, which the validator skips (e.g. action costs)
+_NUMERIC_EFFECTS = {'increase', 'decrease', 'assign', 'scale-up', 'scale-down'}
+
+def _typed_vars(node) -> list:
+    """
+        Read a typed variable list such as (?x ?y - block ?z) into (name, type) pairs, see _type_set.
+    """
+    names = []
+    pending = []
+    expect_type = False
+    for item in node.items if isinstance(node, SExpr) else []:
+        if isinstance(item, SExpr):
+            members = item.atoms()[1:] if item.head == 'either' else []
+            names.extend((name, _type_set(members)) for name in pending)
+            pending = []
+            expect_type = False
+        elif item == '-':
+            expect_type = True
+        elif expect_type:
+            names.extend((name, _type_set(item)) for name in pending)
+            pending = []
+            expect_type = False
+        else:
+            pending.append(item.lower())
+    return names + [(name, None) for name in pending]
+
+def _type_set(param_type):
+    """
+        The types a parameter accepts, as a frozenset of lowercased names (several for an
+        (either ...) type), or None when any object is accepted.
+    """
+    if param_type is None:
+        return None
+    members = frozenset(name.lower() for name in ([param_type] if isinstance(param_type, str) else param_type))
+    return None if not members or 'object' in members else members
+
+class _Schema:
+    """
+        An action compiled by PlanValidator. Conditions and effects address one flat
+        environment list: the parameters first, then the quantified variables, then
+        the constants, so grounding a step is copying its arguments into a template.
+    """
+    __slots__ = ("name", "params", "types", "env", "slots", "precondition", "literals", "effects", "source", "unchecked")
+
+    def __init__(self, name: str, params: list):
+        self.name = name
+        self.params = [param for param, _ in params]
+        self.types = [param_type for _, param_type in params]
+        self.env = [None] * len(params)
+        self.slots = {param: i for i, param in enumerate(self.params)}
+        self.precondition = None
+        # (positive, predicate, indices) of a precondition made of literals only, else None
+        self.literals = None
+        self.effects = []
+        self.source = []
+        # Precondition texts holding conditions the validator cannot evaluate, e.g. numeric ones
+        self.unchecked = []
+
+class PlanValidator:
+    """
+        Check a plan against the parsed actions of a domain by simulating its states.
+
+        Actions are compiled once into condition trees and effect lists over integer
+        indices. Each ground fact is interned as an int, and a state is a set of those
+        ints, so applying a step costs a few tuple lookups per precondition and effect.
+        STRIPS conditions with negation, equality, or, imply, forall and exists are
+        supported, as are conditional and universal effects. Numeric effects such as
+        (increase (total-cost) 1) are skipped. Numeric conditions cannot be evaluated:
+        they are unknown, a step whose precondition only depends on them is assumed
+        applicable and the plan is then neither reported valid nor invalid. Temporal
+        plans are checked as sequential ones.
+    """
 
-        # Skip the outer (:goal ...) parenthesis
-        ind_list = sorted_keys[1:]
+    def __init__(self, domain: dict, objects=None):
+        """
+            Args:
+                domain: Parsed domain, as found under the domain name in PDDLParser.run
+                objects: Objects of the problem, as in PDDLParser.run, see set_objects
+        """
+        self._fact_ids = {}
+        self._parents = {}
+        types = domain.get("types") or {}
+        if isinstance(types, dict):
+            for parent, children in types.items():
+                for child in children:
+                    self._parents[child.lower()] = parent.lower()
+        self._constants = self._typed_objects(domain.get("constants") or [])
+        self.set_objects(objects or [])
+        # Conditions that could not be evaluated and were assumed to hold, see validate
+        self.unchecked = set()
+        self.actions = {}
+        for name, action in (domain.get("actions") or {}).items():
+            self.actions[name.lower()] = self._compile_action(name, action)
 
-        # Check if there's an (and ...) wrapper
-        if ind_list:
-            first_content = block_text[ind_list[0]:ind_list[0] + 5].lower()
-            if first_content.startswith("(and"):
-                ind_list = ind_list[1:]
+    def set_objects(self, objects):
+        """
+            Set the objects of the problem, used for the parameter types and quantifiers.
+        """
+        self._object_types = dict(self._constants)
+        self._object_types.update(self._typed_objects(objects))
+        self._ancestors = {}
+        self._domains = {}
+
+    def validate(self, problem: dict, plan=None) -> dict:
+        """
+            Simulate a plan from the initial state of a problem and check its goal.
+
+            Args:
+                problem: Parsed problem, as found under its name in PDDLParser.run
+                plan: Iterable of step strings such as "(move a b)", defaults to problem["plan"]
 
-        # Handle edge case: empty after removing (and)
-        if not ind_list:
+            Returns:
+                dict: "valid" (every step applicable and the goal reached), "goal_reached",
+                      "steps" (number of steps applied), "failed_step" (1-based index of the
+                      first failing step, or None), "action" (its text), "error",
+                      "unsatisfied" (grounded preconditions, or goals, that do not hold) and
+                      "unchecked" (conditions that could not be evaluated, e.g. numeric ones).
+                      When the verdict depends on unchecked conditions, "valid" (and
+                      "goal_reached" for goals) is None and "error" is "unsupported condition"
+        """
+        self.set_objects(problem.get("objects") or [])
+        self.unchecked = set()
+        state = self.initial_state(problem.get("init") or [])
+        result = {"valid": False, "goal_reached": False, "steps": 0, "failed_step": None,
+                  "action": None, "error": None, "unsatisfied": [], "unchecked": []}
+
+        steps = problem.get("plan", []) if plan is None else plan
+        for index, step in enumerate(steps, 1):
+            error, unsatisfied = self.apply(state, step)
+            if error == "unsupported condition":
+                # The next states are unknown, so the plan cannot be checked further
+                result.update(valid=None, goal_reached=None, action=str(step), error=error,
+                              unchecked=sorted(self.unchecked))
+                return result
+            if error is not None:
+                result.update(failed_step=index, action=str(step), error=error, unsatisfied=unsatisfied,
+                              unchecked=sorted(self.unchecked))
+                return result
+            result["steps"] = index
+
+        goal, env = self._compile_goal(problem.get("goal") or [])
+        unsatisfied = []
+        unknown_goals = []
+        for node, text in goal:
+            holds = self._holds(node, env, state)
+            if holds is False:
+                unsatisfied.append(text)
+            elif holds is None:
+                unknown_goals.append(text)
+        self.unchecked.update(unknown_goals)
+        result["unchecked"] = sorted(self.unchecked)
+        if unsatisfied:
+            result["error"] = "goal not reached"
+            result["unsatisfied"] = unsatisfied
+        elif self.unchecked:
+            result["goal_reached"] = None if unknown_goals else True
+            result["valid"] = None
+            result["error"] = "unsupported condition"
+        else:
+            result["goal_reached"] = True
+            result["valid"] = True
+        return result
+
+    def initial_state(self, facts) -> set:
+        """
+            Return the state made of the atoms of an :init section (numeric facts are skipped).
+        """
+        state = set()
+        for fact in facts:
+            node = _first_list(str(fact))
+            if node is not None and node.head not in ('=', 'not', '') and all(isinstance(item, str) for item in node.items):
+                state.add(self._fact_id((node.head,) + tuple(item.lower() for item in node.items[1:])))
+        return state
+
+    def apply(self, state: set, step):
+        """
+            Apply one plan step to state, in place. A precondition that cannot be evaluated
+            is assumed to hold and added to self.unchecked; a conditional effect whose
+            condition cannot be evaluated stops with the error "unsupported condition".
+
+            Returns:
+                tuple: (error, unsatisfied), (None, []) when the step was applied
+        """
+        tokens = str(step).replace('(', ' ').replace(')', ' ').lower().split()
+        schema = self.actions.get(tokens[0]) if tokens else None
+        if schema is None:
+            return f"unknown action {tokens[0] if tokens else str(step)!r}", []
+        args = tokens[1:]
+        if len(args) != len(schema.params):
+            return f"{schema.name} takes {len(schema.params)} arguments, {len(args)} given", []
+        for arg, param_type in zip(args, schema.types):
+            if param_type is not None and self._types_of(arg).isdisjoint(param_type):
+                return f"{arg} is not of type {' or '.join(sorted(param_type))}", []
+
+        env = schema.env[:]
+        env[:len(args)] = args
+        fact_ids = self._fact_ids
+        if schema.literals is not None:
+            for positive, predicate, indices in schema.literals:
+                if (fact_ids.get((predicate,) + tuple(map(env.__getitem__, indices))) in state) is not positive:
+                    return "precondition not satisfied", self._unsatisfied(schema, env, state)
+        else:
+            holds = self._holds(schema.precondition, env, state)
+            if holds is False:
+                return "precondition not satisfied", self._unsatisfied(schema, env, state)
+            if holds is None:
+                self.unchecked.update(schema.unchecked)
+
+        adds, deletes = [], []
+        unknown = self._collect_effects(schema.effects, env, state, adds, deletes)
+        if unknown is not None:
+            self.unchecked.add(unknown)
+            return "unsupported condition", [unknown]
+        # Deletes first, so that an atom both deleted and added is true afterwards
+        state.difference_update(deletes)
+        state.update(adds)
+        return None, []
+
+    def _fact_id(self, key) -> int:
+        fact_id = self._fact_ids.get(key)
+        if fact_id is None:
+            fact_id = self._fact_ids[key] = len(self._fact_ids)
+        return fact_id
+
+    def _typed_objects(self, objects) -> dict:
+        if isinstance(objects, dict):
+            return {name.lower(): object_type.lower() for object_type, names in objects.items() for name in names}
+        return {name.lower(): 'object' for name in objects}
+
+    def _types_of(self, name: str) -> set:
+        """
+            The type of an object and all the types above it.
+        """
+        types = self._ancestors.get(name)
+        if types is None:
+            types = set()
+            current = self._object_types.get(name)
+            while current is not None and current not in types:
+                types.add(current)
+                current = self._parents.get(current)
+            self._ancestors[name] = types
+        return types
+
+    def _objects_of(self, object_type) -> list:
+        """
+            Objects (and constants) of a type (see _type_set), the range of a quantified variable.
+        """
+        objects = self._domains.get(object_type)
+        if objects is None:
+            objects = self._domains[object_type] = [
+                name for name in self._object_types
+                if object_type is None or not self._types_of(name).isdisjoint(object_type)
+            ]
+        return objects
+
+    def _compile_action(self, name: str, action: dict) -> _Schema:
+        parameters = action.get("parameters") or {}
+        values = [value.lower() for value in parameters.get("values", [])]
+        types = [_type_set(value) for value in parameters.get("types", [])]
+        schema = _Schema(name, [(value, types[i] if i < len(types) else None) for i, value in enumerate(values)])
+
+        conditions = []
+        for text in action.get("preconditions") or []:
+            node = _first_list(text)
+            if node is not None:
+                conditions.append(self._compile_condition(node, schema))
+                schema.source.append(text)
+        schema.precondition = (_AND, conditions)
+        schema.unchecked = [text for condition, text in zip(conditions, schema.source) if _unsupported(condition)]
+        if all(c[0] == _ATOM or (c[0] == _NOT and c[1][0] == _ATOM) for c in conditions):
+            schema.literals = [(True, c[1], c[2]) if c[0] == _ATOM else (False, c[1][1], c[1][2]) for c in conditions]
+
+        for text in action.get("effect") or []:
+            node = _first_list(text)
+            if node is not None:
+                schema.effects.extend(self._compile_effect(node, schema))
+        return schema
+
+    def _compile_goal(self, goal) -> tuple:
+        """
+            Compile the goals of a problem, returning them with their environment of constants.
+        """
+        schema = _Schema("goal", [])
+        compiled = []
+        for text in goal:
+            node = _first_list(str(text))
+            if node is not None:
+                compiled.append((self._compile_condition(node, schema), str(text)))
+        return compiled, schema.env
+
+    def _index(self, item, schema: _Schema) -> int:
+        """
+            Environment index of a variable or constant of an atom.
+        """
+        name = item.lower()
+        index = schema.slots.get(name)
+        if index is None:
+            index = schema.slots[name] = len(schema.env)
+            schema.env.append(None if name.startswith('?') else name)
+        return index
+
+    def _compile_condition(self, node: SExpr, schema: _Schema):
+        head = node.head
+        lists = node.lists()
+        if head == 'and':
+            return (_AND, [self._compile_condition(sub, schema) for sub in lists])
+        if head == 'or':
+            return (_OR, [self._compile_condition(sub, schema) for sub in lists])
+        if head == 'not' and len(lists) == 1:
+            return (_NOT, self._compile_condition(lists[0], schema))
+        if head == 'imply' and len(lists) == 2:
+            return (_IMPLY, self._compile_condition(lists[0], schema), self._compile_condition(lists[1], schema))
+        if head in ('forall', 'exists') and len(lists) == 2:
+            variables = _typed_vars(lists[0])
+            slots = []
+            for name, _ in variables:
+                # A fresh slot, even if the name is used again in another quantifier
+                schema.slots[name] = len(schema.env)
+                slots.append(len(schema.env))
+                schema.env.append(None)
+            body = self._compile_condition(lists[1], schema)
+            return (_FORALL if head == 'forall' else _EXISTS, slots, [t for _, t in variables], body)
+        if head == '=' and not lists and len(node.items) == 3:
+            return (_EQ, self._index(node.items[1], schema), self._index(node.items[2], schema))
+        if head and not lists and head not in ('<', '>', '<=', '>=', '='):
+            return (_ATOM, head, tuple(self._index(item, schema) for item in node.items[1:]))
+        return (_UNSUPPORTED, head)
+
+    def _compile_effect(self, node: SExpr, schema: _Schema) -> list:
+        head = node.head
+        lists = node.lists()
+        if head == 'and':
+            return [effect for sub in lists for effect in self._compile_effect(sub, schema)]
+        if head == 'not' and len(lists) == 1 and not lists[0].lists():
+            atom = self._compile_condition(lists[0], schema)
+            return [(_DEL, atom[1], atom[2])] if atom[0] == _ATOM else []
+        if head == 'when' and len(lists) == 2:
+            return [(_WHEN, self._compile_condition(lists[0], schema), self._compile_effect(lists[1], schema),
+                     _sexpr_text(lists[0]))]
+        if head == 'forall' and len(lists) == 2:
+            variables = _typed_vars(lists[0])
+            slots = []
+            for name, _ in variables:
+                schema.slots[name] = len(schema.env)
+                slots.append(len(schema.env))
+                schema.env.append(None)
+            return [(_FORALL_EFFECT, slots, [t for _, t in variables], self._compile_effect(lists[1], schema))]
+        if head in _NUMERIC_EFFECTS or lists:
             return []
+        atom = self._compile_condition(node, schema)
+        return [(_ADD, atom[1], atom[2])] if atom[0] == _ATOM else []
+
+    def _holds(self, node, env: list, state: set):
+        """
+            Evaluate a condition: True, False, or None when its value depends on conditions
+            that cannot be evaluated (numeric comparisons), following three-valued logic.
+        """
+        op = node[0]
+        if op == _ATOM:
+            return self._fact_ids.get((node[1],) + tuple(map(env.__getitem__, node[2]))) in state
+        if op == _AND:
+            return _all3(self._holds(sub, env, state) for sub in node[1])
+        if op == _NOT:
+            holds = self._holds(node[1], env, state)
+            return None if holds is None else not holds
+        if op == _OR:
+            return _any3(self._holds(sub, env, state) for sub in node[1])
+        if op == _IMPLY:
+            holds = self._holds(node[1], env, state)
+            return _any3((None if holds is None else not holds, self._holds(node[2], env, state)))
+        if op == _EQ:
+            return env[node[1]] == env[node[2]]
+        if op == _FORALL:
+            return _all3(self._holds(node[3], env, state) for _ in self._bind(node[1], node[2], env))
+        if op == _EXISTS:
+            return _any3(self._holds(node[3], env, state) for _ in self._bind(node[1], node[2], env))
+        return None
+
+    def _bind(self, slots: list, types: list, env: list, position: int = 0):
+        """
+            Assign every combination of objects of the right types to the quantified slots of env.
+        """
+        if position == len(slots):
+            yield
+            return
+        for name in self._objects_of(types[position]):
+            env[slots[position]] = name
+            yield from self._bind(slots, types, env, position + 1)
+
+    def _collect_effects(self, effects: list, env: list, state: set, adds: list, deletes: list):
+        """
+            Gather the facts added and deleted by effects. Returns None, or the text of the
+            condition of a conditional effect that cannot be evaluated.
+        """
+        for effect in effects:
+            op = effect[0]
+            if op == _ADD:
+                adds.append(self._fact_id((effect[1],) + tuple(map(env.__getitem__, effect[2]))))
+            elif op == _DEL:
+                fact_id = self._fact_ids.get((effect[1],) + tuple(map(env.__getitem__, effect[2])))
+                if fact_id is not None:
+                    deletes.append(fact_id)
+            elif op == _WHEN:
+                # Conditions of conditional effects are read in the state before the step
+                holds = self._holds(effect[1], env, state)
+                if holds is None:
+                    return effect[3]
+                unknown = self._collect_effects(effect[2], env, state, adds, deletes) if holds else None
+                if unknown is not None:
+                    return unknown
+            else:
+                for _ in self._bind(effect[1], effect[2], env):
+                    unknown = self._collect_effects(effect[3], env, state, adds, deletes)
+                    if unknown is not None:
+                        return unknown
+        return None
+
+    def _unsatisfied(self, schema: _Schema, env: list, state: set) -> list:
+        """
+            The preconditions of a failing step that do not hold, with its arguments substituted.
+        """
+        binding = dict(zip(schema.params, env))
+        failed = []
+        for condition, text in zip(schema.precondition[1], schema.source):
+            if self._holds(condition, env, state) is False:
+                failed.append(re.sub(r'\?[\w\-]+', lambda m: binding.get(m.group().lower(), m.group()), text))
+        return failed
+
+def _all3(values):
+    """
+        Three-valued conjunction of an iterable of True, False or None (unknown).
+    """
+    result = True
+    for value in values:
+        if value is False:
+            return False
+        if value is None:
+            result = None
+    return result
+
+def _any3(values):
+    """
+        Three-valued disjunction of an iterable of True, False or None (unknown).
+    """
+    result = False
+    for value in values:
+        if value is True:
+            return True
+        if value is None:
+            result = None
+    return result
+
+def _unsupported(node) -> bool:
+    """
+        Whether a compiled condition holds a condition that PlanValidator cannot evaluate.
+    """
+    op = node[0]
+    if op == _UNSUPPORTED:
+        return True
+    if op == _NOT:
+        return _unsupported(node[1])
+    if op in (_AND, _OR):
+        return any(map(_unsupported, node[1]))
+    if op == _IMPLY:
+        return _unsupported(node[1]) or _unsupported(node[2])
+    if op in (_FORALL, _EXISTS):
+        return _unsupported(node[3])
+    return False
+
+def _sexpr_text(node) -> str:
+    """
+        Write an SExpr back as PDDL text, e.g. "(>= (fuel ?x) 1)".
+    """
+    return "(" + " ".join(item if isinstance(item, str) else _sexpr_text(item) for item in node.items) + ")"
+
+def _first_list(text: str):
+    """
+        The first list of a PDDL expression, e.g. the SExpr of "(on a b)", or None.
+    """
+    for item in parse_sexpr(text).items:
+        if isinstance(item, SExpr):
+            return item
+    return None
+
+def validate_plan(domain_text: str, problem_text: str, plan_text: str) -> dict:
+    """
+        Check that a plan is applicable from the initial state of a problem and reaches its goal.
+
+        Args:
+            domain_text (str): Raw PDDL domain file content.
+            problem_text (str): Raw PDDL problem file content.
+            plan_text (str): Raw plan file content.
+
+        Returns:
+            dict: Validation result, see PlanValidator.validate
+    """
+    parser = PDDLParser(domain_text, problem_text, plan_text)
+    data = parser.run()
+    problem = data[parser.domain_name]["Problems"][parser.problem_name]
+    return PlanValidator(data[parser.domain_name]).validate(problem, problem.get("plan", []))
+
+OWL_URL = "https://raw.githubusercontent.com/BharathMuppasani/AI-Planning-Ontology/main/models/plan-ontology-rdf-ESWC.owl"
+
+# IRI of the planning ontology itself, its classes and properties live in PLAN_ONTOLOGY_IRI + "#"
+PLAN_ONTOLOGY_IRI = "https://purl.org/ai4s/ontology/planning"
+
+# Precompiled N-Triples copy of OWL_URL next to this module, created by write_base_snapshot()
+BASE_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plan-ontology.nt")
+
+# N-Triples carries no prefixes, so the ones of the OWL file are bound again when loading the snapshot
+BASE_PREFIXES = {
+    "": "https://purl.org/ai4s/ontology/planning#",
+    "owl": "http://www.w3.org/2002/07/owl#",
+    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+    "xsd": "http://www.w3.org/2001/XMLSchema#",
+}
+
+# rdflib store of the graphs returned by copy_base_ontology
+GRAPH_STORE = "SimpleMemory"
+
+# Parsed planning ontology per source, shared by all create_ontology calls of this process
+_base_ontologies = {}
+
+def _fetch_owl(url: str) -> str:
+    """
+        Download the OWL file, through pyodide.http inside the browser and urllib elsewhere.
+    """
+    try:
+        import pyodide.http
+    except ImportError:
+        from urllib.request import urlopen
+        with urlopen(url) as response:
+            return response.read().decode("utf-8")
+    return pyodide.http.open_url(url).read()
+
+async def fetch_owl_async(url: str) -> str:
+    """
+        Download the OWL file without blocking: through pyodide.http.pyfetch inside the
+        browser, and urllib in a worker thread elsewhere.
+    """
+    try:
+        import pyodide.http
+    except ImportError:
+        import asyncio
+        return await asyncio.to_thread(_fetch_owl, url)
+    response = await pyodide.http.pyfetch(url)
+    return await response.string()
+
+def _default_base_source() -> str:
+    # The plugin only writes ontology.py into the Pyodide file system, so the snapshot is not there.
+    # Elsewhere the snapshot is used once it has been written, see write_base_snapshot()
+    if sys.platform == "emscripten" or not os.path.exists(BASE_SNAPSHOT_PATH):
+        return "remote"
+    return "local"
+
+def load_base_ontology(source: str = None) -> Graph:
+    """
+        Return the parsed AI4S Planning Ontology.
+
+        The ontology is loaded on the first call only; later calls return the same
+        graph. It must not be modified - use copy_base_ontology() to get a graph
+        that can be built on.
+
+        Args:
+            source: "local" to load the bundled N-Triples snapshot (BASE_SNAPSHOT_PATH),
+                    "remote" to download and parse OWL_URL. Defaults to "local" when
+                    the snapshot exists, except inside Pyodide, and to "remote" otherwise.
+
+        Returns:
+            Graph: RDF graph of the planning ontology
+    """
+    source = source or _default_base_source()
+    if source in _base_ontologies:
+        return _base_ontologies[source]
+
+    return _parse_base_ontology(source, _fetch_owl(OWL_URL) if source == "remote" else None)
+
+async def load_base_ontology_async(source: str = None, fetch=None) -> Graph:
+    """
+        Same as load_base_ontology, downloading the OWL file without blocking.
+
+        Args:
+            source: "local" or "remote", see load_base_ontology
+            fetch: Optional async callable (url) -> OWL text used instead of fetch_owl_async,
+                   e.g. a local stub
+    """
+    source = source or _default_base_source()
+    if source in _base_ontologies:
+        return _base_ontologies[source]
+    owl_text = await (fetch or fetch_owl_async)(OWL_URL) if source == "remote" else None
+    return _parse_base_ontology(source, owl_text)
 
-        # Extract individual goal conditions
-        goals = []
-        previous_end = -1
-        for idx in ind_list:
-            if idx > previous_end:
-                goals.append(block_text[idx:index_dict[idx] + 1])
-                previous_end = index_dict[idx]
+def _parse_base_ontology(source: str, owl_text: str = None) -> Graph:
+    """
+        Parse the planning ontology from the local snapshot, or from the downloaded owl_text, and keep it for the process.
+    """
+    _load_rdflib()
+    graph = Graph()
+    if source == "local":
+        if not os.path.exists(BASE_SNAPSHOT_PATH):
+            raise FileNotFoundError(
+                f"Planning ontology snapshot not found at {BASE_SNAPSHOT_PATH}. "
+                "Create it with write_base_snapshot() or load the ontology with source='remote'."
+            )
+        graph.parse(BASE_SNAPSHOT_PATH, format="nt")
+        for prefix, namespace in BASE_PREFIXES.items():
+            graph.bind(prefix, namespace, override=True, replace=True)
+    elif source == "remote":
+        graph.parse(data=owl_text, format="xml")
+    else:
+        raise ValueError(f"Unknown planning ontology source: {source!r}")
+
+    _base_ontologies[source] = graph
+    return graph
+
+def copy_base_ontology(source: str = None) -> Graph:
+    """
+        Return a new graph holding the triples and namespace bindings of the planning ontology.
+    """
+    base = load_base_ontology(source)
+    _load_rdflib()
+    # The context-free store indexes triples faster than the default one, and the
+    # generated graphs never use named graphs
+    graph = Graph(store=GRAPH_STORE)
+    for prefix, namespace in base.namespaces():
+        graph.bind(prefix, namespace, override=True, replace=True)
+    graph.addN((s, p, o, graph) for s, p, o in base)
+    return graph
+
+def write_base_snapshot(path: str = BASE_SNAPSHOT_PATH, url: str = OWL_URL, owl_path: str = None) -> int:
+    """
+        Download the planning ontology and store it as the N-Triples snapshot loaded by default.
+        Lines are sorted so that regenerating an unchanged ontology gives a small diff.
 
-        return goals
+        Args:
+            path: Output file, defaults to the snapshot location next to this module
+            url: OWL file to convert
+            owl_path: Optional local copy of the OWL file (e.g. from a clone of the ontology
+                      repository) converted instead of downloading url
 
-def create_ontology(domain_text, problem_text, plan_text=""):
+        Returns:
+            int: Number of triples written
+    """
+    _load_rdflib()
+    graph = Graph()
+    if owl_path is not None:
+        with open(owl_path, encoding="utf-8") as f:
+            owl_text = f.read()
+    else:
+        owl_text = _fetch_owl(url)
+    graph.parse(data=owl_text, format="xml")
+    lines = graph.serialize(format="nt", encoding="utf-8").decode("utf-8").splitlines()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(sorted(line for line in lines if line)) + "\n")
+    return len(graph)
+
+class ConversionStats:
+    """
+        Opt-in instrumentation of a conversion.
+
+        Records the wall time of each phase (parse, load_base, build, serialize or stream),
+        the number of items of each parsed section, the number of new triples produced by
+        each OntologyBuilder.add_* method and, when trace_memory is set, the peak memory
+        allocated by Python during each phase and overall (with tracemalloc). With a
+        ConversionCache, cache_hit tells whether the result was served from the cache,
+        in which case nothing else is recorded.
+    """
+
+    def __init__(self, trace_memory: bool = True):
+        """
+            Args:
+                trace_memory: Trace allocations with tracemalloc, which slows the conversion down
+        """
+        self.trace_memory = trace_memory
+        self.phases = {}
+        self.phase_peak_memory = {}
+        self.peak_memory = None
+        self.sections = {}
+        self.triples = {}
+        # None without a cache, see create_ontology(cache=...)
+        self.cache_hit = None
+        self._nested = []
+
+    @contextlib.contextmanager
+    def tracing(self):
+        """
+            Trace the memory of the whole conversion, if trace_memory is set.
+        """
+        started = False
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started = True
+        try:
+            yield self
+        finally:
+            if self.trace_memory and tracemalloc.is_tracing():
+                self.peak_memory = max(self.phase_peak_memory.values(), default=tracemalloc.get_traced_memory()[1])
+            if started:
+                tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """
+            Time a phase; its time and peak memory are added to those of earlier phases of the same name.
+        """
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1]
+                self.phase_peak_memory[name] = max(self.phase_peak_memory.get(name, 0), peak)
+
+    def count_sections(self, data: dict):
+        """
+            Count the items of each section of parsed PDDL data (see PDDLParser.run).
+        """
+        for domain_data in data.values():
+            for section in ("requirements", "types", "constants", "predicates", "actions"):
+                if section in domain_data:
+                    self.sections[section] = self.sections.get(section, 0) + _item_count(domain_data[section])
+            problems = domain_data.get("Problems", {})
+            self.sections["problems"] = self.sections.get("problems", 0) + len(problems)
+            for problem in problems.values():
+                for section, key in (("objects", "objects"), ("init_facts", "init"), ("goal_facts", "goal"), ("plan_steps", "plan")):
+                    if key in problem:
+                        self.sections[section] = self.sections.get(section, 0) + _item_count(problem[key])
+
+    def instrument(self, builder):
+        """
+            Attach to an OntologyBuilder: its add_* methods are wrapped to count the triples
+            each one produces (not counting those of the add_* methods it calls), and its
+            build and serialization phases are timed.
+
+            Returns:
+                OntologyBuilder: The builder
+        """
+        builder.stats = self
+        for name in dir(builder):
+            if name.startswith("add_") and name not in _UNCOUNTED_METHODS:
+                setattr(builder, name, self._count_triples(builder, name, getattr(builder, name)))
+        return builder
+
+    def _count_triples(self, builder, name: str, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            before = builder.produced
+            self._nested.append(0)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                inner = self._nested.pop()
+                produced = builder.produced - before
+                self.triples[name] = self.triples.get(name, 0) + produced - inner
+                if self._nested:
+                    self._nested[-1] += produced
+        return wrapper
+
+    def as_dict(self) -> dict:
+        """
+            Returns:
+                dict: JSON-serializable stats, times in seconds and memory in bytes
+        """
+        return {
+            "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            "sections": dict(self.sections),
+            "triples": dict(self.triples),
+            "total_triples": sum(self.triples.values()),
+            "phase_peak_memory": dict(self.phase_peak_memory),
+            "peak_memory": self.peak_memory,
+            "cache_hit": self.cache_hit,
+        }
+
+# OntologyBuilder methods that ConversionStats does not count: add_new is the primitive
+# that the add_* methods produce triples with, the others only dispatch to add_domain
+_UNCOUNTED_METHODS = {"add_new", "add_data", "add_ir"}
+
+def _item_count(section) -> int:
+    """
+        Number of items of a parsed section; typed types, constants and objects are grouped by type.
+    """
+    if isinstance(section, dict) and all(isinstance(value, list) for value in section.values()):
+        return sum(map(len, section.values()))
+    return len(section)
+
+def _phase(stats, name: str):
+    return stats.phase(name) if stats is not None else contextlib.nullcontext()
+
+# Default bound, in bytes, of the in-memory tier of ConversionCache
+CONVERSION_CACHE_BYTES = 64 << 20
+
+@functools.lru_cache(maxsize=None)
+def code_version() -> str:
+    """
+        Hash of the source of this module, part of the ConversionCache keys so that
+        results of an older converter are not served after it changed.
+    """
+    try:
+        with open(os.path.abspath(__file__), "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()[:16]
+    except (NameError, OSError):
+        return "unknown"
+
+class ConversionCache:
+    """
+        Serialized create_ontology results, keyed by a hash of the input texts, the
+        output options and the code version (see code_version).
+
+        Results are kept in a least-recently-used dict bounded by their total size in
+        bytes and, when a directory is given, also written there so that they outlive
+        the process and are shared by every process using the same directory.
+    """
+
+    def __init__(self, maxbytes: int = CONVERSION_CACHE_BYTES, directory: str = None):
+        """
+            Args:
+                maxbytes: Bound of the total size in bytes of the results kept in memory (str
+                          results count as UTF-8), 0 keeps none
+                directory: Optional directory of the on-disk tier, created if missing
+        """
+        self.maxbytes = maxbytes
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.entries = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, domain_text: str, problem_text: str, plan_text: str, *options) -> str:
+        """
+            Content hash of a conversion: its three input texts and the options changing its output.
+        """
+        return _content_hash(domain_text, problem_text, plan_text or "", *map(repr, options), code_version())
+
+    def get(self, key: str):
+        """
+            Return the cached result for key, or None.
+        """
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            # Re-inserted as the most recently used entry
+            self.entries[key] = entry
+            self.hits += 1
+            return entry[0]
+
+        value = self._read(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.disk_hits += 1
+        self._remember(key, value)
+        return value
+
+    def put(self, key: str, value):
+        """
+            Cache a serialized result (str, or bytes when compressed).
+        """
+        self._remember(key, value)
+        if self.directory is not None:
+            path = self._path(key, isinstance(value, bytes))
+            # Written under a temporary name and renamed, so readers never see a partial file
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with (open(tmp, "wb") if isinstance(value, bytes) else open(tmp, "w", encoding="utf-8")) as f:
+                f.write(value)
+            os.replace(tmp, path)
+
+    def clear(self):
+        """
+            Drop the in-memory tier. The on-disk tier is left untouched.
+        """
+        self.entries = {}
+        self.nbytes = 0
+
+    def info(self) -> dict:
+        """
+            Returns:
+                dict: hits (disk_hits of which came from the directory), misses, hit_rate,
+                      entries and bytes in memory and maxbytes
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "bytes": self.nbytes,
+            "maxbytes": self.maxbytes,
+        }
+
+    def _remember(self, key: str, value):
+        # Entries are (value, size) pairs, so that str values are encoded only once to be measured
+        size = len(value.encode("utf-8")) if isinstance(value, str) else len(value)
+        if size > self.maxbytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[1]
+        while self.entries and self.nbytes + size > self.maxbytes:
+            self.nbytes -= self.entries.pop(next(iter(self.entries)))[1]
+        self.entries[key] = (value, size)
+        self.nbytes += size
+
+    def _path(self, key: str, binary: bool) -> str:
+        return os.path.join(self.directory, key + (".bin" if binary else ".txt"))
+
+    def _read(self, key: str):
+        if self.directory is None:
+            return None
+        path = self._path(key, False)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        path = self._path(key, True)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read()
+        return None
+
+def create_ontology(domain_text, problem_text, plan_text="", base_source=None, sink=None, stream_format="nt",
+                    stats=None, output_format="xml", compress=False, cache=None, abox_only=False, imports=True,
+                    parse_workers=None, summarize=None):
     """
         Create an ontology from PDDL domain, problem, and optional plan definitions.
 
         Steps:
         1. Parse domain, problem, and plan using PDDLParser.
-        2. Download the AI4S Planning Ontology OWL file (required by plugin).
-        3. Load ontology into RDF graph.
-        4. Build and serialize ontology from parsed PDDL data.
+        2. Copy the AI4S Planning Ontology, which is loaded once per process.
+        3. Build and serialize ontology from parsed PDDL data.
 
         Args:
             domain_text (str): Raw PDDL domain file content.
             problem_text (str): Raw PDDL problem file content.
             plan_text (str): Optional raw plan file content.
+            base_source (str): "local" (bundled snapshot) or "remote" (OWL_URL), see load_base_ontology.
+            sink: Optional file-like object (or callable) to stream the ontology to instead of returning it.
+            stream_format (str): "nt" or "nquads", the line format used with sink.
+            stats: Optional ConversionStats filled in during the conversion, or a callable
+                   (hook) called with the stats dict (see ConversionStats.as_dict) at the end;
+                   for a hook, memory is not traced (pass a ConversionStats to trace it).
+            output_format (str): "xml" (RDF/XML), "turtle", "nt" or "json-ld", see OUTPUT_FORMATS.
+            compress (bool): gzip the output. With a sink, the sink must accept bytes.
+            cache: Optional ConversionCache. A cached result is returned without parsing or
+                   building (stats then only record "cache_hit": True, and a hook is still
+                   called); a new result is added to it. Streaming to a sink bypasses the cache.
+            abox_only (bool): Leave the planning ontology (classes and properties) out and only
+                              output the instance triples made from the PDDL; the ontology is
+                              then not loaded at all.
+            imports (bool): With abox_only, declare the planning ontology with owl:imports.
+            parse_workers (int): Parse large inputs across this many worker processes,
+                                 see PDDLParser.run_parallel. By default they are parsed here.
+            summarize (int): Output a summary graph for visualization: init and goal sections
+                             with more facts than this become one node per predicate, and
+                             problems with more objects one node per type (see
+                             OntologyBuilder.add_fact_summary). By default every fact is kept.
 
         Returns:
-            str: Serialized RDF/XML representation of the ontology
+            str: Serialized representation of the ontology (RDF/XML by default), gzip bytes
+                 when compress is set, or the number of triples written when a sink is given
     """
-    parser = PDDLParser(domain_text, problem_text, plan_text)
-    json_data = parser.run()
+    imports = PLAN_ONTOLOGY_IRI if abox_only and imports else None
+    hook = None if stats is None or isinstance(stats, ConversionStats) else stats
+    if hook is not None:
+        # tracemalloc slows the conversion down, too much for a logging hook called on every conversion
+        stats = ConversionStats(trace_memory=False)
+
+    if cache is not None and sink is None:
+        key = cache.key(domain_text, problem_text, plan_text, base_source or _default_base_source(),
+                        output_format, compress, abox_only, imports, summarize)
+        result = cache.get(key)
+        hit = result is not None
+        if not hit:
+            result = create_ontology(domain_text, problem_text, plan_text, base_source, stats=stats,
+                                     output_format=output_format, compress=compress, abox_only=abox_only,
+                                     imports=imports is not None, parse_workers=parse_workers, summarize=summarize)
+            cache.put(key, result)
+        if stats is not None:
+            stats.cache_hit = hit
+        if hook is not None:
+            hook(stats.as_dict())
+        return result
+
+    options = (base_source, sink, stream_format, output_format, compress, abox_only, imports, parse_workers, summarize)
+    if stats is None:
+        return _create_ontology(domain_text, problem_text, plan_text, *options, None)
+
+    with stats.tracing():
+        result = _create_ontology(domain_text, problem_text, plan_text, *options, stats)
+    if hook is not None:
+        hook(stats.as_dict())
+    return result
+
+def _create_ontology(domain_text, problem_text, plan_text, base_source, sink, stream_format, output_format, compress,
+                     abox_only, imports, parse_workers, summarize, stats):
+    with _phase(stats, "parse"):
+        parser = PDDLParser(domain_text, problem_text, plan_text)
+        if parse_workers:
+            json_data = parser.run_parallel(parse_workers)
+        else:
+            domain = parser.run_ir()
+            json_data = {domain.name: domain.sections()}
 
-    OWL_URL = "https://raw.githubusercontent.com/BharathMuppasani/AI-Planning-Ontology/main/models/plan-ontology-rdf-ESWC.owl"
     # Required for the plugin
-    owl_content = pyodide.http.open_url(OWL_URL)
-    owl_content = owl_content.read()
-    
-    g = Graph()
-    g.parse(data=owl_content, format="xml")
-    
-    builder = OntologyBuilder(g)
-    return builder.build_from_dict(json_data)
+    with _phase(stats, "load_base"):
+        g = _new_graph(base_source, sink, output_format, abox_only)
+    return _build_ontology(json_data, g, sink, stream_format, output_format, compress, imports, summarize, stats)
+
+def _new_graph(base_source, sink, output_format, abox_only=False):
+    """
+        Graph the ontology is built into, holding the planning ontology unless abox_only:
+        an NTriplesWriter when the result is an N-Triples document, a Graph otherwise.
+    """
+    if sink is None and output_format == "nt":
+        return NTriplesWriter(None if abox_only else load_base_ontology(base_source))
+    if not abox_only:
+        return copy_base_ontology(base_source)
+    _load_rdflib()
+    graph = Graph(store=GRAPH_STORE)
+    for prefix, namespace in BASE_PREFIXES.items():
+        graph.bind(prefix, namespace, override=True, replace=True)
+    return graph
+
+async def create_ontology_async(domain_text, problem_text, plan_text="", base_source=None, fetch=None, sink=None,
+                                stream_format="nt", output_format="xml", compress=False, abox_only=False, imports=True,
+                                summarize=None):
+    """
+        Same as create_ontology, without blocking the event loop while the planning ontology downloads.
+
+        The download is started before the PDDL texts are parsed and runs while they are,
+        since the two do not depend on each other. Inside Pyodide this keeps the editor
+        responsive during the first conversion; later ones reuse the loaded ontology.
+
+        Args:
+            fetch: Optional async callable (url) -> OWL text replacing fetch_owl_async,
+                   e.g. a local stub for offline use
+            Others: see create_ontology
+
+        Returns:
+            str: Same result as create_ontology
+    """
+    if abox_only:
+        # Nothing to download
+        return create_ontology(domain_text, problem_text, plan_text, base_source, sink, stream_format,
+                               output_format=output_format, compress=compress, abox_only=True, imports=imports,
+                               summarize=summarize)
+
+    import asyncio
+    base = asyncio.ensure_future(load_base_ontology_async(base_source, fetch))
+    # Let the download start before parsing takes over the thread
+    await asyncio.sleep(0)
+    try:
+        domain = PDDLParser(domain_text, problem_text, plan_text).run_ir()
+        json_data = {domain.name: domain.sections()}
+    except BaseException:
+        base.cancel()
+        raise
+    await base
+    return _build_ontology(json_data, _new_graph(base_source, sink, output_format), sink, stream_format, output_format,
+                           compress, None, summarize, None)
+
+def _build_ontology(json_data, g, sink, stream_format, output_format, compress, imports, summarize, stats):
+    builder = OntologyBuilder(g, imports=imports, summarize_facts=summarize, summarize_objects=summarize)
+    if stats is not None:
+        stats.count_sections(json_data)
+        stats.instrument(builder)
+    if sink is not None:
+        return _stream(builder, json_data, sink, stream_format, compress)
+    return builder.build_from_dict(json_data, output_format, compress)
+
+def _stream(builder, data, sink, stream_format, compress):
+    if not compress:
+        return builder.stream_from_dict(data, sink, format=stream_format)
+    with gzip.GzipFile(fileobj=sink, mode="wb", compresslevel=GZIP_LEVEL) as gz:
+        return builder.stream_from_dict(data, lambda line: gz.write(line.encode("utf-8")), format=stream_format)
+
+def iter_problems(domain_name: str, problems):
+    """
+        Parse problems of a domain one at a time.
+
+        Args:
+            domain_name: Name of the domain the problems belong to
+            problems: Iterable of problem texts or (problem_text, plan_text) pairs
+
+        Yields:
+            tuple: (problem_name, parsed problem) in the format of PDDLParser.run. A name
+                   already used by an earlier problem gets a numbered suffix (p, p_2, p_3,
+                   ...), since the URIs of a problem and its facts and plan derive from it
+    """
+    names = set()
+    for problem in problems:
+        problem_text, plan_text = (problem, "") if isinstance(problem, str) else problem
+        problem = PDDLParser("", problem_text, plan_text).run_problem_ir()
+        unique, number = problem.name, 1
+        while unique in names:
+            number += 1
+            unique = f"{problem.name}_{number}"
+        names.add(unique)
+        yield unique, problem.sections()
+
+def create_suite_ontology(domain_text, problems, base_source=None, sink=None, stream_format="nt",
+                          output_format="xml", compress=False):
+    """
+        Create one ontology for a domain and many of its problems.
+
+        The domain is parsed and its triples are added once; the problems are then
+        parsed and added to the same graph one by one, so only one parsed problem
+        is held in memory at a time. With a sink, the triples are streamed out as
+        they are produced instead of being kept in the graph. Problems sharing a name,
+        as in generated suites, are renamed p_2, p_3, ... (see iter_problems) so that
+        they are not merged.
+
+        Args:
+            domain_text (str): Raw PDDL domain file content.
+            problems: Iterable of raw problem texts or (problem_text, plan_text) pairs.
+            base_source (str): "local" (bundled snapshot) or "remote" (OWL_URL), see load_base_ontology.
+            sink: Optional file-like object (or callable) to stream the ontology to instead of returning it.
+            stream_format (str): "nt" or "nquads", the line format used with sink.
+            output_format (str): "xml" (RDF/XML), "turtle", "nt" or "json-ld", see OUTPUT_FORMATS.
+            compress (bool): gzip the output. With a sink, the sink must accept bytes.
+
+        Returns:
+            str: Serialized representation of the ontology (RDF/XML by default), gzip bytes
+                 when compress is set, or the number of triples written when a sink is given
+    """
+    parser = PDDLParser(domain_text, "", "")
+    data = parser.run_domain()
+    data[parser.domain_name]["Problems"] = iter_problems(parser.domain_name, problems)
+
+    builder = OntologyBuilder(copy_base_ontology(base_source))
+    if sink is not None:
+        return _stream(builder, data, sink, stream_format, compress)
+    return builder.build_from_dict(data, output_format, compress)
+
+# Prefixes predeclared in SPARQL queries, so templates can use :domain, rdfs:label, ...
+QUERY_PREFIXES = dict(BASE_PREFIXES, rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#")
+
+# Number of prepared queries and of cached results per graph
+QUERY_CACHE_SIZE = 128
+
+@functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+def prepare_query(query: str):
+    """
+        Parse and translate a SPARQL query once per process.
+    """
+    _load_rdflib()
+    return prepareQuery(query, initNs=QUERY_PREFIXES)
+
+class QueryCache:
+    """
+        Results of SPARQL queries over one graph, valid for one version of that graph.
+
+        The owner of the graph bumps its version whenever the graph changes; the first
+        query made with a new version drops all the cached results.
+    """
+
+    def __init__(self, maxsize: int = QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.version = None
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+
+    def query(self, graph, version, query: str, bindings: dict = None):
+        """
+            Run a SPARQL query, or return its result cached for this version of the graph.
+
+            Args:
+                graph: Graph to query
+                version: Version of the graph, any value that changes when the graph does
+                query: SPARQL query text
+                bindings: Optional {variable name: RDF term} initial bindings
+
+            Returns:
+                list, bool or Graph: Result rows for SELECT, the answer for ASK and
+                                     the result graph for CONSTRUCT and DESCRIBE
+        """
+        if version != self.version:
+            self.results = {}
+            self.version = version
+        key = (query, tuple(sorted(bindings.items())) if bindings else None)
+        if key in self.results:
+            self.hits += 1
+            return self.results[key]
+
+        self.misses += 1
+        result = graph.query(prepare_query(query), initBindings=bindings)
+        if result.type == "SELECT":
+            value = list(result)
+        elif result.type == "ASK":
+            value = result.askAnswer
+        else:
+            value = result.graph
+
+        if len(self.results) >= self.maxsize:
+            del self.results[next(iter(self.results))]
+        self.results[key] = value
+        return value
+
+def _content_hash(*texts) -> str:
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class OntologySession:
+    """
+        Stateful converter for the editor workflow, where the same domain is converted
+        again and again with a changing problem or plan.
+
+        The parsed domain and its triples are kept, keyed by a hash of the domain text.
+        When only the problem or plan text changes, only the problem/plan triples are
+        recomputed and swapped in the session graph.
+    """
+
+    def __init__(self, base_source: str = None):
+        """
+            Args:
+                base_source: Planning ontology source, see load_base_ontology
+        """
+        self.base_source = base_source
+        self.graph = None
+        self.domain_name = None
+        self._domain_key = None
+        self._domain_triples = None
+        self._problem_key = None
+        self._problem_triples = set()
+        # Bumped on every change of the session graph, see query
+        self.version = 0
+        self.queries = QueryCache()
+
+    def convert(self, domain_text: str, problem_text: str, plan_text: str = "", output_format: str = "xml",
+                compress: bool = False):
+        """
+            Same as create_ontology, reusing the domain triples when domain_text did not change.
+
+            Returns:
+                str: Serialized representation of the ontology (RDF/XML by default), gzip bytes when compress is set
+        """
+        self.update(domain_text, problem_text, plan_text)
+        return serialize_graph(self.graph, output_format, compress=compress)
+
+    def update(self, domain_text: str, problem_text: str, plan_text: str = "") -> Graph:
+        """
+            Bring the session graph up to date with the given texts and return it.
+        """
+        domain_key = _content_hash(domain_text)
+        if domain_key != self._domain_key:
+            parser = PDDLParser(domain_text, "", "")
+            parser.run_domain()
+
+            # The builders of the session only collect their triples
+            builder = OntologyBuilder(None)
+            builder.add_data(parser.data)
+            self._domain_triples = builder.emitted
+            self.domain_name = parser.domain_name
+
+            self.graph = copy_base_ontology(self.base_source)
+            self.graph.addN((s, p, o, self.graph) for s, p, o in self._domain_triples)
+            self._domain_key = domain_key
+            self._problem_key = None
+            self._problem_triples = set()
+            self.version += 1
+
+        problem_key = _content_hash(problem_text, plan_text)
+        if problem_key != self._problem_key:
+            problem = PDDLParser("", problem_text, plan_text).run_problem_ir()
+            builder = OntologyBuilder(None)
+            domain_URI = builder.token_uri(self.domain_name)
+            builder.add_problem(builder.planOntology.problem, builder.planOntology.hasProblem, domain_URI, {problem.name: problem.sections()})
+            problem_triples = builder.emitted
+
+            # Keep triples shared with the planning ontology or the domain
+            base = load_base_ontology(self.base_source)
+            for triple in self._problem_triples - problem_triples - self._domain_triples:
+                if triple not in base:
+                    self.graph.remove(triple)
+            self.graph.addN((s, p, o, self.graph) for s, p, o in problem_triples - self._problem_triples)
+
+            self._problem_triples = problem_triples
+            self._problem_key = problem_key
+            self.version += 1
+
+        return self.graph
+
+    def query(self, query: str, bindings: dict = None):
+        """
+            Run a SPARQL query against the session graph. Results are cached until
+            update() or convert() changes the graph, see QueryCache.query.
+        """
+        if self.graph is None:
+            raise ValueError("The session has no graph yet, call update() or convert() first")
+        return self.queries.query(self.graph, self.version, query, bindings)
+
+PLAN_EXTENSIONS = (".plan", ".soln", ".sol")
+
+def _find_plan(problem_path: str):
+    """
+        Return the plan file stored next to a problem (p01.plan, p01.soln, p01.pddl.plan, ...), or None.
+    """
+    stem = os.path.splitext(problem_path)[0]
+    for base in (stem, problem_path):
+        for extension in PLAN_EXTENSIONS:
+            if os.path.isfile(base + extension):
+                return base + extension
+    return None
+
+def find_corpus_tasks(root: str) -> list:
+    """
+        Collect (domain, problem, plan) conversion tasks from a benchmark directory tree.
+
+        In every directory, files with "domain" in their name are domain files and the
+        other .pddl files are problems. A problem uses the domain file of its directory,
+        or the one whose name contains the problem name when there are several
+        (e.g. domain_p01.pddl for p01.pddl). Plans are looked up next to the problem.
+
+        Args:
+            root: Corpus directory
+
+        Returns:
+            list: Task dicts with "domain", "problem", "plan" and "output" (relative output path)
+    """
+    tasks = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        pddl_files = sorted(f for f in filenames if f.lower().endswith(".pddl"))
+        domains = [f for f in pddl_files if "domain" in f.lower()]
+        problems = [f for f in pddl_files if "domain" not in f.lower()]
+        if not domains:
+            continue
+
+        for problem in problems:
+            stem = os.path.splitext(problem)[0]
+            matching = [d for d in domains if stem in d] if len(domains) > 1 else domains
+            if not matching:
+                continue
+            problem_path = os.path.join(dirpath, problem)
+            tasks.append({
+                "domain": os.path.join(dirpath, matching[0]),
+                "problem": problem_path,
+                "plan": _find_plan(problem_path),
+                "output": os.path.join(os.path.relpath(dirpath, root), stem + ".owl"),
+            })
+    return tasks
+
+def read_manifest(path: str) -> list:
+    """
+        Read conversion tasks from a JSON Lines manifest.
+
+        Each line is an object with "domain", "problem" and optional "plan" and "output"
+        keys. Relative paths are resolved against the manifest directory.
+
+        Args:
+            path: Manifest file
+
+        Returns:
+            list: Task dicts in the format of find_corpus_tasks
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    tasks = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            task = {key: os.path.join(base_dir, entry[key]) if entry.get(key) else None for key in ("domain", "problem", "plan")}
+            task["output"] = entry.get("output") or os.path.splitext(os.path.basename(entry["problem"]))[0] + ".owl"
+            tasks.append(task)
+    return tasks
+
+def _read_text(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def _output_path(path: str, output_format: str, compress: bool) -> str:
+    """
+        Swap the default ".owl" extension of a task output for the one of the output format, adding ".gz" when compressing.
+    """
+    stem, extension = os.path.splitext(path)
+    if extension == ".owl":
+        path = stem + OUTPUT_FORMATS[output_format][1]
+    if compress and not path.endswith(".gz"):
+        path += ".gz"
+    return path
+
+@functools.lru_cache(maxsize=None)
+def _corpus_cache(directory: str) -> ConversionCache:
+    """
+        ConversionCache over directory, one per process so that its in-memory tier is kept across tasks.
+    """
+    return ConversionCache(directory=directory)
+
+def _convert_task(task: dict, output_dir: str, base_source: str, stats: bool = False, output_format: str = "xml",
+                  compress: bool = False, cache_dir: str = None, abox_only: bool = False) -> dict:
+    """
+        Convert one task and write its ontology. Errors are reported in the result instead of raised.
+    """
+    start = time.perf_counter()
+    output = _output_path(os.path.join(output_dir, task["output"]), output_format, compress)
+    result = {"problem": task["problem"], "output": output, "ok": True, "error": None}
+    try:
+        plan_text = _read_text(task["plan"]) if task.get("plan") else ""
+        task_stats = ConversionStats() if stats else None
+        texts = (_read_text(task["domain"]), _read_text(task["problem"]), plan_text)
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        if output_format == "nt" and cache_dir is None:
+            # N-Triples are streamed to the file as they are produced, without filling a graph
+            with (open(output, "wb") if compress else open(output, "w", encoding="utf-8")) as f:
+                create_ontology(*texts, base_source=base_source, sink=f, stats=task_stats, compress=compress,
+                                abox_only=abox_only)
+        else:
+            cache = _corpus_cache(cache_dir) if cache_dir is not None else None
+            document = create_ontology(*texts, base_source=base_source, stats=task_stats,
+                                       output_format=output_format, compress=compress, cache=cache, abox_only=abox_only)
+            with (open(output, "wb") if compress else open(output, "w", encoding="utf-8")) as f:
+                f.write(document)
+        if task_stats is not None:
+            result["stats"] = task_stats.as_dict()
+    except Exception as e:
+        result["ok"] = False
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+def _convert_task_star(args):
+    return _convert_task(*args)
+
+def convert_corpus(tasks: list, output_dir: str, workers: int = None, base_source: str = None, stats: bool = False,
+                   output_format: str = "xml", compress: bool = False, cache_dir: str = None,
+                   abox_only: bool = False) -> dict:
+    """
+        Convert many (domain, problem, plan) tasks into one ontology file each, across a process pool.
+
+        The planning ontology is loaded before the pool starts, so forked workers inherit
+        the parsed graph; with other start methods each worker loads it once at startup.
+        A failing task is recorded in the report and does not stop the others.
+
+        Args:
+            tasks: Task dicts, see find_corpus_tasks and read_manifest
+            output_dir: Directory the "output" paths of the tasks are relative to
+            workers: Number of worker processes, defaults to the number of CPUs.
+                     1 converts in the current process.
+            base_source: Planning ontology source, see load_base_ontology
+            stats: Add the ConversionStats of each task to its result
+            output_format: Output format of the ontologies, see OUTPUT_FORMATS
+            compress: gzip the ontologies
+            cache_dir: Optional ConversionCache directory, tasks whose inputs were converted
+                       before (in this or an earlier run) are copied from it
+            abox_only: Only write the instance triples, importing the planning ontology (see create_ontology)
+
+        Returns:
+            dict: Summary report with totals, elapsed time and one result per task, in task order
+    """
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    if not abox_only:
+        load_base_ontology(base_source)
+
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format!r}, expected one of {', '.join(OUTPUT_FORMATS)}")
+    jobs = [(task, output_dir, base_source, stats, output_format, compress, cache_dir, abox_only) for task in tasks]
+    if workers == 1 or len(jobs) <= 1:
+        results = [_convert_task_star(job) for job in jobs]
+    else:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        from concurrent.futures import ProcessPoolExecutor
+        initializer = None if abox_only else load_base_ontology
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=(base_source,)) as executor:
+            results = list(executor.map(_convert_task_star, jobs, chunksize=chunksize))
+
+    failed = [r for r in results if not r["ok"]]
+    return {
+        "total": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "workers": workers,
+        "seconds": round(time.perf_counter() - start, 4),
+        "results": results,
+    }
+
+def main(argv=None) -> int:
+    """
+        Command-line entry point, run "python ontology.py --help" for usage.
+    """
+    parser = argparse.ArgumentParser(prog="ontology.py", description="Convert PDDL domains, problems and plans into planning ontology graphs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert = subparsers.add_parser("convert", help="Convert a corpus directory or a JSON Lines manifest")
+    convert.add_argument("input", help="Corpus directory or manifest (.jsonl) file")
+    convert.add_argument("-o", "--output-dir", required=True, help="Directory to write the ontologies to")
+    convert.add_argument("-j", "--workers", type=int, default=None, help="Number of worker processes (default: all CPUs)")
+    convert.add_argument("--base-source", choices=["local", "remote"], default=None, help="Where to load the planning ontology from")
+    convert.add_argument("--report", default=None, help="Write the JSON summary report to this file")
+    convert.add_argument("--stats", action="store_true", help="Add phase times, counts and peak memory of each problem to the report")
+    convert.add_argument("-f", "--format", choices=list(OUTPUT_FORMATS), default="xml", help="Output format (default: xml, RDF/XML)")
+    convert.add_argument("--gzip", action="store_true", help="gzip-compress the output files")
+    convert.add_argument("--abox-only", action="store_true",
+                         help="Only write the instance triples, with an owl:imports of the planning ontology instead of a copy of it")
+    convert.add_argument("--cache-dir", default=None, help="Reuse the ontologies of inputs already converted into this cache directory")
+
+    snapshot = subparsers.add_parser("snapshot", help="Download the planning ontology into the local N-Triples snapshot")
+    snapshot.add_argument("--path", default=BASE_SNAPSHOT_PATH, help="Snapshot file to write")
+    snapshot.add_argument("--owl", default=None, help="Convert this local copy of the OWL file instead of downloading it")
+
+    validate = subparsers.add_parser("validate", help="Check that a plan is applicable and reaches the goal of its problem")
+    validate.add_argument("domain", help="PDDL domain file")
+    validate.add_argument("problem", help="PDDL problem file")
+    validate.add_argument("plan", help="Plan file")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "snapshot":
+        count = write_base_snapshot(args.path, owl_path=args.owl)
+        print(f"Wrote {count} triples to {args.path}")
+        return 0
+
+    if args.command == "validate":
+        result = validate_plan(_read_text(args.domain), _read_text(args.problem), _read_text(args.plan))
+        print(json.dumps(result, indent=2))
+        # 2 when the plan could not be fully checked, see PlanValidator
+        return {True: 0, False: 1, None: 2}[result["valid"]]
+
+    tasks = find_corpus_tasks(args.input) if os.path.isdir(args.input) else read_manifest(args.input)
+    report = convert_corpus(tasks, args.output_dir, workers=args.workers, base_source=args.base_source, stats=args.stats,
+                            output_format=args.format, compress=args.gzip, cache_dir=args.cache_dir,
+                            abox_only=args.abox_only)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    for result in report["results"]:
+        if not result["ok"]:
+            print(f"FAILED {result['problem']}: {result['error']}", file=sys.stderr)
+    print(f"Converted {report['succeeded']}/{report['total']} problems in {report['seconds']}s with {report['workers']} workers")
+    return 0 if report["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ontology  # noqa: E402
+
+DOMAIN = """
+(define (domain logistics)
+  (:requirements :strips :typing)
+  (:types truck place - object)
+  (:predicates (at ?t - truck ?p - place) (road ?from ?to - place))
+  (:action drive
+    :parameters (?t - truck ?from ?to - place)
+    :precondition (and (at ?t ?from) (road ?from ?to))
+    :effect (and (not (at ?t ?from)) (at ?t ?to))))
+"""
+
+PROBLEM = """
+(define (problem deliver) (:domain logistics)
+  (:objects t1 - truck a b c - place)
+  (:init (at t1 a) (road a b) (road b c))
+  (:goal (at t1 c)))
+"""
+
+PLAN = """
+(drive t1 a b)
+(drive t1 b c)
+; cost = 2 (unit cost)
+"""
+
+@pytest.fixture
+def base_ontology(monkeypatch):
+    """
+        A small stand-in for the planning ontology, used for every base source so that tests run offline.
+    """
+    ontology._load_rdflib()
+    from rdflib import BNode, Graph, Literal, Namespace
+    from rdflib.namespace import OWL, RDF, RDFS
+
+    po = Namespace(ontology.BASE_PREFIXES[""])
+    graph = Graph()
+    for prefix, namespace in ontology.BASE_PREFIXES.items():
+        graph.bind(prefix, namespace)
+    graph.add((po.domain, RDF.type, OWL.Class))
+    graph.add((po.domain, RDFS.label, Literal("domain")))
+    graph.add((po.hasProblem, RDF.type, OWL.ObjectProperty))
+    restriction = BNode()
+    graph.add((po.problem, RDFS.subClassOf, restriction))
+    graph.add((restriction, RDF.type, OWL.Restriction))
+    graph.add((restriction, OWL.onProperty, po.hasPlan))
+    for source in ("local", "remote"):
+        monkeypatch.setitem(ontology._base_ontologies, source, graph)
+    return graph
+
+@pytest.fixture
+def pddl():
+    return DOMAIN, PROBLEM, PLAN
+
+@pytest.fixture
+def built_graph(base_ontology):
+    """
+        Build the ontology of (domain_text, problem_text, plan_text) into an rdflib Graph, before any serialization.
+    """
+    def build(domain_text, problem_text, plan_text):
+        builder = ontology.OntologyBuilder(ontology.copy_base_ontology())
+        builder.add_data(ontology.PDDLParser(domain_text, problem_text, plan_text).run())
+        builder.flush()
+        return builder.g
+    return build
@@ -0,0 +1,56 @@
+import pytest
+from rdflib import BNode, Graph, Literal, Namespace
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDFS, XSD
+
+import ontology
+
+TEMPORAL_PLAN = """
+0.000: (drive t1 a b) [10.500]
+10.501: (drive t1 b c) [3.250]
+; cost = 13.75
+"""
+
+@pytest.fixture
+def escaped_base(base_ontology):
+    """
+        The stub ontology, with literals the N-Triples escaping has to get right.
+    """
+    node = BNode()
+    base_ontology.add((node, RDFS.comment, Literal('a "quoted" \\ backslash\nand a new line\r\n')))
+    base_ontology.add((node, RDFS.label, Literal("tab\tand unicode é→", lang="en")))
+    base_ontology.add((node, RDFS.seeAlso, Literal("1.50", datatype=XSD.decimal)))
+    return base_ontology
+
+@pytest.mark.parametrize("plan", ["", "sequential", "temporal"])
+def test_isomorphic_to_graph_build(escaped_base, built_graph, pddl, plan):
+    domain_text, problem_text, plan_text = pddl
+    plan_text = {"": "", "sequential": plan_text, "temporal": TEMPORAL_PLAN}[plan]
+
+    document = ontology.create_ontology(domain_text, problem_text, plan_text, output_format="nt")
+    parsed = Graph().parse(data=document, format="nt")
+    expected = built_graph(domain_text, problem_text, plan_text)
+
+    assert len(document.splitlines()) == len(expected)
+    assert isomorphic(parsed, expected)
+
+def test_temporal_plan_triples(escaped_base, pddl):
+    domain_text, problem_text, _ = pddl
+    document = ontology.create_ontology(domain_text, problem_text, TEMPORAL_PLAN, output_format="nt")
+    parsed = Graph().parse(data=document, format="nt")
+
+    po = Namespace(ontology.BASE_PREFIXES[""])
+    assert set(parsed.objects(None, po.hasDuration)) == {Literal(10.5), Literal(3.25)}
+    assert set(parsed.objects(None, po.hasPlanCost)) == {Literal("13.75", datatype=XSD.decimal)}
+
+def test_writer_drops_repeated_triples(escaped_base):
+    writer = ontology.NTriplesWriter(escaped_base)
+    triple = next(iter(escaped_base))
+    assert len(writer) == len(escaped_base)
+    assert not writer.add(triple)
+    assert len(writer) == len(escaped_base)
+
+def test_writer_cannot_be_queried(escaped_base):
+    builder = ontology.OntologyBuilder(ontology.NTriplesWriter(escaped_base))
+    with pytest.raises(TypeError):
+        builder.query("SELECT * WHERE { ?s ?p ?o }")
@@ -0,0 +1,35 @@
+import gzip
+
+import pytest
+from rdflib import Graph
+from rdflib.compare import isomorphic
+
+import ontology
+
+@pytest.mark.parametrize("compress", [False, True], ids=["plain", "gzip"])
+@pytest.mark.parametrize("output_format", sorted(ontology.OUTPUT_FORMATS))
+def test_round_trip(base_ontology, built_graph, pddl, output_format, compress):
+    result = ontology.create_ontology(*pddl, output_format=output_format, compress=compress)
+
+    if compress:
+        assert isinstance(result, bytes)
+        result = gzip.decompress(result).decode("utf-8")
+    assert isinstance(result, str)
+
+    parsed = Graph().parse(data=result, format=output_format)
+    assert len(parsed) > len(base_ontology)
+    assert isomorphic(parsed, built_graph(*pddl))
+
+@pytest.mark.parametrize("output_format", sorted(ontology.OUTPUT_FORMATS))
+def test_serialize_to_file(built_graph, pddl, output_format, tmp_path):
+    graph = built_graph(*pddl)
+    path = tmp_path / ("ontology" + ontology.OUTPUT_FORMATS[output_format][1] + ".gz")
+    ontology.serialize_graph(graph, output_format, destination=str(path), compress=True)
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        parsed = Graph().parse(data=f.read(), format=output_format)
+    assert isomorphic(parsed, graph)
+
+def test_unknown_format(base_ontology, pddl):
+    with pytest.raises(ValueError):
+        ontology.create_ontology(*pddl, output_format="n3")
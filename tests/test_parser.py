@@ -0,0 +1,149 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import ontology
+
+DOMAIN = """
+; Logistics with hyphenated names
+(define (domain Log-Ext)
+  (:requirements :strips :typing :negative-preconditions)
+  (:types truck car - vehicle
+          vehicle place - object)
+  (:constants depot - place)
+  (:predicates (at ?v - vehicle ?p - place) (free ?p) (road-to ?from-place ?to-place - place))
+  (:action move-fast :parameters (?v - vehicle ?from-place ?to-place - place) :precondition (and (at ?v ?from-place) (road-to ?from-place ?to-place) (not (free ?to-place))) :effect (and (not (at ?v ?from-place)) (at ?v ?to-place)))
+  (:action clear :parameters (?p) :precondition (free ?p) :effect (not (free ?p)))
+  (:action ship
+    :parameters (?x - (either truck car) ?p - place)
+    :precondition (at ?x ?p)
+    :effect (free ?p)))
+"""
+
+PROBLEM = """
+; comment before the problem
+(define (problem P1) (:domain Log-Ext)
+  (:objects t1 t2 - truck a b - place)
+  (:init (at t1 a) (road-to a b) ; trailing comment
+         (= (total-cost) 0))
+  (:goal (and (at t1 b) (not (free a)))))
+"""
+
+PLAN = """
+0.000: (move-fast t1 a b) [1.000]
+; cost = 1.5 (general cost)
+"""
+
+@pytest.fixture
+def parser():
+    return ontology.PDDLParser(DOMAIN, PROBLEM, PLAN)
+
+def test_domain_sections(parser):
+    assert parser.domain_name == "Log-Ext"
+    assert parser.requirements == [":strips", ":typing", ":negative-preconditions"]
+    assert parser.types == {"vehicle": ["truck", "car"], "object": ["vehicle", "place"]}
+    assert parser.predicates == [
+        "(at ?v - vehicle ?p - place)", "(free ?p)", "(road-to ?from-place ?to-place - place)",
+    ]
+
+def test_constants_offset(parser):
+    # The ':constants' keyword does not leak 'nts' into the constants
+    assert parser.constants == {"place": ["depot"]}
+
+def test_one_line_action_header(parser):
+    assert list(parser.actions) == ["move-fast", "clear", "ship"]
+    assert parser.actions["move-fast"] == {
+        "parameters": {"values": ["?v", "?from-place", "?to-place"], "types": ["vehicle", "place", "place"]},
+        "preconditions": ["(at ?v ?from-place)", "(road-to ?from-place ?to-place)", "(not (free ?to-place))"],
+        "effect": ["(not (at ?v ?from-place))", "(at ?v ?to-place)"],
+    }
+
+def test_hyphenated_parameters():
+    params = ontology.DomainFunctions().get_params("(:action a :parameters (?from-place ?to-place - place))")
+    assert params == {"parameters": {"values": ["?from-place", "?to-place"], "types": ["place", "place"]}}
+
+def test_untyped_parameters(parser):
+    assert parser.actions["clear"]["parameters"] == {"values": ["?p"], "types": []}
+
+def test_either_parameters(parser):
+    assert parser.actions["ship"]["parameters"] == {"values": ["?x", "?p"], "types": [["truck", "car"], "place"]}
+
+def test_single_negated_effect(parser):
+    assert parser.actions["clear"]["effect"] == ["(not (free ?p))"]
+    assert parser.actions["clear"]["preconditions"] == ["(free ?p)"]
+
+def test_problem_sections(parser):
+    assert parser.problem_name == "P1"
+    assert ontology.ProblemFunctions().get_problem_name(parser.problem_text) == ("P1", "Log-Ext")
+    assert parser.objects == {"truck": ["t1", "t2"], "place": ["a", "b"]}
+    assert parser.init == ["(at t1 a)", "(road-to a b)", "(= (total-cost) 0)"]
+    assert parser.goal == ["(at t1 b)", "(not (free a))"]
+
+def test_comments_removed_on_first_access():
+    parser = ontology.PDDLParser(DOMAIN, PROBLEM, PLAN)
+    assert "problem_text" not in vars(parser)
+    assert parser.problem_name == "P1"
+    assert ";" not in parser.problem_text
+    assert "domain_text" not in vars(parser)
+    assert parser._remove_pddl_comments("(at \t a  b) ; c\n\n\t(p)") == "(at a b) \n (p)"
+
+def test_run(parser):
+    problem = parser.run()["Log-Ext"]["Problems"]["P1"]
+    assert problem["plan"] == ["(move-fast t1 a b)"]
+    assert problem["plan_times"] == [(0.0, 1.0)]
+    assert problem["plan_cost"] == 1.5
+
+def test_run_ir(parser):
+    data = parser.run()["Log-Ext"]
+    sections = ontology.PDDLParser(DOMAIN, PROBLEM, PLAN).run_ir().sections()
+    assert list(sections["predicates"]) == data["predicates"]
+    for name, action in data["actions"].items():
+        assert sections["actions"][name]["parameters"] == action["parameters"]
+        assert list(sections["actions"][name]["preconditions"]) == action["preconditions"]
+        assert list(sections["actions"][name]["effect"]) == action["effect"]
+    problem, expected = sections["Problems"]["P1"], data["Problems"]["P1"]
+    assert problem["objects"] == expected["objects"]
+    for key in ("init", "goal", "plan"):
+        assert list(problem[key]) == expected[key]
+    assert (problem["plan_times"], problem["plan_cost"]) == (expected["plan_times"], expected["plan_cost"])
+
+def test_atom_table_parts(parser):
+    domain = parser.run_ir()
+    builder = ontology.OntologyBuilder(None)
+    tables = [domain.problems[0].init, domain.problems[0].goal]
+    tables += [table for action in domain.actions for table in (action.preconditions, action.effects)]
+    for table in tables:
+        for index, expression in enumerate(table):
+            assert table.atom(index) == builder.atom_parts(expression)
+
+def test_missing_sections():
+    parser = ontology.PDDLParser("(define (domain d))", "(define (problem p) (:domain d))")
+    assert parser.requirements == []
+    assert parser.types == {}
+    assert parser.actions == {}
+    assert parser.objects == []
+    assert parser.init == []
+
+EDGE_DOMAIN = """
+(define (domain d) (:predicates (at ?x))
+  (:action a :parameters (?x) :precondition (at ?x) :effect (not (at ?x)))
+  (:action b :parameters (?x) :precondition (at ?x) :effect (at ?x)))
+"""
+
+@pytest.mark.parametrize("domain_text, problem_text", [
+    (EDGE_DOMAIN, "(define (problem p) (:domain d) (:init (at a) (at b))) (:goal (at a))"),
+    (EDGE_DOMAIN, "(define (problem p) (:domain d) (:init (at a) (at b))) (foo (bar))"),
+    (EDGE_DOMAIN, "(define (problem p) (:domain d) (:init (at a) (at b) (:goal (at a)))"),
+    (EDGE_DOMAIN, "(define (problem p) (:domain d) (:init (and (at a)) (at b)) (:goal (and (at a) (at b))))"),
+    (EDGE_DOMAIN, "(define (problem p) (:domain d) (:goal (at a)) (:init) (:init (at b)))"),
+    (EDGE_DOMAIN, "(:init (at a) (at b)) (:goal (at a))"),
+    (EDGE_DOMAIN.rstrip()[:-1] + ") (:action c :parameters (?x) :effect (at ?x))", "(define (problem p) (:init (at a)))"),
+    (EDGE_DOMAIN.rstrip()[:-1] + " (:action c", "(define (problem p) (:init (at a"),
+], ids=["goal-after-define", "list-after-define", "unclosed-init", "leading-and", "repeated-section",
+        "fragment", "action-after-define", "unclosed"])
+def test_run_parallel_edge_cases(monkeypatch, domain_text, problem_text):
+    # Every section is split into units, which threads run on a single CPU too
+    monkeypatch.setattr(ontology, "PARALLEL_MIN_CHARS", 1)
+    expected = ontology.PDDLParser(domain_text, problem_text, "(a x)").run()
+    with ThreadPoolExecutor(2) as executor:
+        assert ontology.PDDLParser(domain_text, problem_text, "(a x)").run_parallel(2, executor) == expected
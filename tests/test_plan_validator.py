@@ -0,0 +1,79 @@
+import pytest
+
+import ontology
+
+FUEL_DOMAIN = """
+(define (domain fuel)
+  (:requirements :typing :numeric-fluents :conditional-effects)
+  (:types car)
+  (:predicates (moved ?c - car) (serviced ?c - car))
+  (:functions (fuel ?c - car))
+  (:action go
+    :parameters (?c - car)
+    :precondition (and (>= (fuel ?c) 1) (not (moved ?c)))
+    :effect (and (moved ?c) (decrease (fuel ?c) 1)))
+  (:action service
+    :parameters (?c - car)
+    :precondition (moved ?c)
+    :effect (when (> (fuel ?c) 2) (serviced ?c))))
+"""
+
+def fuel_problem(goal):
+    return f"(define (problem p) (:domain fuel) (:objects a - car) (:init (= (fuel a) 5)) (:goal {goal}))"
+
+def test_valid_plan(pddl):
+    result = ontology.validate_plan(*pddl)
+    assert result["valid"] is True
+    assert result["goal_reached"] is True
+    assert result["steps"] == 2
+
+def test_first_failing_step(pddl):
+    domain_text, problem_text, _ = pddl
+    result = ontology.validate_plan(domain_text, problem_text, "(drive t1 a b)\n(drive t1 a b)\n")
+    assert result["valid"] is False
+    assert result["failed_step"] == 2
+    assert result["unsatisfied"] == ["(at t1 a)"]
+
+def test_goal_not_reached(pddl):
+    domain_text, problem_text, _ = pddl
+    result = ontology.validate_plan(domain_text, problem_text, "(drive t1 a b)\n")
+    assert result["valid"] is False
+    assert result["goal_reached"] is False
+    assert result["unsatisfied"] == ["(at t1 c)"]
+
+@pytest.mark.parametrize("plan, error", [
+    ("(fly t1 a b)", "unknown action 'fly'"),
+    ("(drive t1 a)", "drive takes 3 arguments, 2 given"),
+    ("(drive a a b)", "a is not of type truck"),
+])
+def test_malformed_steps(pddl, plan, error):
+    domain_text, problem_text, _ = pddl
+    result = ontology.validate_plan(domain_text, problem_text, plan)
+    assert result["failed_step"] == 1
+    assert result["error"] == error
+
+def test_numeric_precondition_is_unchecked():
+    result = ontology.validate_plan(FUEL_DOMAIN, fuel_problem("(moved a)"), "(go a)")
+    assert result["valid"] is None
+    assert result["goal_reached"] is True
+    assert result["error"] == "unsupported condition"
+    assert result["unchecked"] == ["(>= (fuel ?c) 1)"]
+
+def test_numeric_precondition_does_not_hide_failures():
+    result = ontology.validate_plan(FUEL_DOMAIN, fuel_problem("(moved a)"), "(go a)\n(go a)")
+    assert result["valid"] is False
+    assert result["failed_step"] == 2
+    assert result["unsatisfied"] == ["(not (moved a))"]
+
+def test_numeric_goal_is_unchecked():
+    result = ontology.validate_plan(FUEL_DOMAIN, fuel_problem("(and (moved a) (> (fuel a) 0))"), "(go a)")
+    assert result["valid"] is None
+    assert result["goal_reached"] is None
+    assert "(> (fuel a) 0)" in result["unchecked"]
+
+def test_numeric_conditional_effect_stops_the_check():
+    result = ontology.validate_plan(FUEL_DOMAIN, fuel_problem("(serviced a)"), "(go a)\n(service a)")
+    assert result["valid"] is None
+    assert result["steps"] == 1
+    assert result["action"] == "(service a)"
+    assert result["error"] == "unsupported condition"
@@ -0,0 +1,41 @@
+import ontology
+
+def test_section_counts(base_ontology, pddl):
+    stats = ontology.ConversionStats(trace_memory=False)
+    ontology.create_ontology(*pddl, stats=stats)
+    assert stats.sections == {
+        "requirements": 2, "types": 2, "constants": 0, "predicates": 2, "actions": 1,
+        "problems": 1, "objects": 4, "init_facts": 3, "goal_facts": 1, "plan_steps": 2,
+    }
+
+def test_triples_per_method(base_ontology, pddl):
+    stats = ontology.ConversionStats(trace_memory=False)
+    document = ontology.create_ontology(*pddl, output_format="nt", stats=stats)
+
+    for method in ("add_new", "add_data", "add_ir"):
+        assert method not in stats.triples
+    # Each method is credited with its own triples, not those of the methods it calls
+    assert stats.triples["add_preconditions"] == 2 * 3
+    assert stats.triples["add_effects"] == 2 * 3
+    assert stats.triples["add_initial_state"] == 3 * 3
+    assert stats.triples["add_goal_state"] == 1 * 3
+    # ofPredicate and one hasArgumentN per argument, plus isNegated for (not (at ?t ?from))
+    assert stats.triples["add_atom"] == 6 + 7 + 9 + 3
+    assert stats.triples["add_plan"] > 0
+    assert stats.as_dict()["total_triples"] == len(document.splitlines()) - len(base_ontology)
+
+def test_hook(base_ontology, pddl):
+    calls = []
+    ontology.create_ontology(*pddl, stats=calls.append)
+    assert len(calls) == 1
+    assert calls[0]["sections"]["objects"] == 4
+    assert calls[0]["peak_memory"] is None
+    assert calls[0]["cache_hit"] is None
+
+def test_hook_on_cache_hit(base_ontology, pddl):
+    cache = ontology.ConversionCache()
+    calls = []
+    for _ in range(2):
+        ontology.create_ontology(*pddl, stats=calls.append, cache=cache)
+    assert [call["cache_hit"] for call in calls] == [False, True]
+    assert calls[1]["total_triples"] == 0
@@ -0,0 +1,30 @@
+import io
+
+from rdflib import Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDFS
+
+import ontology
+
+def test_problems_sharing_a_name_are_not_merged(base_ontology, pddl):
+    domain_text, problem_text, plan_text = pddl
+    other = problem_text.replace("(:goal (at t1 c))", "(:goal (at t1 b))")
+    document = ontology.create_suite_ontology(domain_text, [(problem_text, plan_text), (other, "")], output_format="nt")
+    graph = Graph().parse(data=document, format="nt")
+
+    po = ontology.BASE_PREFIXES[""]
+    labels = {str(label) for label in graph.objects(None, RDFS.label)}
+    assert {"deliver", "deliver_2"} <= labels
+    plan_labels = list(graph.objects(URIRef(po + "deliver_plan"), RDFS.label))
+    assert plan_labels == [Literal("Plan for deliver (2 steps)")]
+    assert not list(graph.objects(URIRef(po + "deliver_2_plan"), RDFS.label))
+
+def test_streamed_suite_has_no_repeated_lines(base_ontology, pddl):
+    domain_text, problem_text, plan_text = pddl
+    sink = io.StringIO()
+    count = ontology.create_suite_ontology(domain_text, [(problem_text, plan_text)] * 2, sink=sink)
+    lines = sink.getvalue().splitlines()
+    assert count == len(lines) == len(set(lines))
+
+    document = ontology.create_suite_ontology(domain_text, [(problem_text, plan_text)] * 2, output_format="nt")
+    assert isomorphic(Graph().parse(data=sink.getvalue(), format="nt"), Graph().parse(data=document, format="nt"))